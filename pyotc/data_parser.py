@@ -14,11 +14,15 @@ from scipy import genfromtxt
 from scipy import array
 
 import configparser
+import keyword
+import numpy as np
+import os
+import warnings
 
 from . import name_constants as co
 
 
-def read_std_data_file(path, lower_names=False, **kwargs):
+def read_std_data_file(path, lower_names=False, cache=False, **kwargs):
     '''
     Read a standard data file.
 
@@ -27,17 +31,32 @@ def read_std_data_file(path, lower_names=False, **kwargs):
 
     The output is a dictionary with the names as keys and their respective
     columns as values.
+
+    If no extra keyword arguments for genfromtxt are given, the columns are
+    parsed directly into arrays. If `cache` is True, the parsed columns are
+    stored in a binary twin file (path + '.npz'), which is loaded instead of
+    the data file, as long as it is newer than the data file.
     '''
-    data = genfromtxt(path,
-                      delimiter='\t',
-                      names=True,
-                      **kwargs
-                      )
-    if lower_names:
-        names = (name.lower() for name in data.dtype.names)
-    else:
+    names = None
+    if not kwargs:
+        if cache:
+            names, cols = _load_twin(path)
+        if names is None:
+            names, cols = _read_columns(path)
+            if cache and names is not None:
+                _save_twin(path, names, cols)
+
+    if names is None:
+        data = genfromtxt(path,
+                          delimiter='\t',
+                          names=True,
+                          **kwargs
+                          )
         names = data.dtype.names
-    cols = array([a for a in zip(*list(data))])
+        cols = array([a for a in zip(*list(data))])
+
+    if lower_names:
+        names = (name.lower() for name in names)
 
     d = OrderedDict()
     for i, name in enumerate(names):
@@ -46,6 +65,69 @@ def read_std_data_file(path, lower_names=False, **kwargs):
     return d
 
 
+def _read_columns(path):
+    """
+    Parse a standard data file directly into an array of its columns.
+
+    Returns (None, None), if the file can not be parsed this way, e.g. if the
+    names would be changed by genfromtxt or values are missing.
+    """
+    with open(path, 'r') as fl:
+        header = fl.readline()
+        text = fl.read()
+
+    names = [name.strip() for name in header.lstrip('#').split('\t')]
+    # Only names genfromtxt leaves untouched are supported
+    if (len(set(names)) != len(names)
+            or not all(name.isidentifier() and not keyword.iskeyword(name)
+                       and name not in ('return', 'file', 'print')
+                       for name in names)):
+        return None, None
+
+    try:
+        with warnings.catch_warnings():
+            # Let numpy raise an error on text that is not a number
+            warnings.simplefilter('error', DeprecationWarning)
+            data = np.fromstring(text, sep=' ')
+    except (ValueError, DeprecationWarning):
+        return None, None
+    # Missing values
+    if (data.size % len(names) != 0 or '\t\t' in text or '\t\n' in text
+            or '\n\t' in text or text.startswith('\t')):
+        return None, None
+
+    cols = np.ascontiguousarray(data.reshape(-1, len(names)).T)
+    return names, cols
+
+
+def _load_twin(path):
+    """
+    Load the names and columns of a standard data file from its binary twin
+    file, if the twin file is newer than the data file.
+    """
+    twin = path + '.npz'
+    try:
+        if os.path.getmtime(twin) < os.path.getmtime(path):
+            return None, None
+        with np.load(twin) as npz:
+            return [str(name) for name in npz['names']], npz['cols']
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def _save_twin(path, names, cols):
+    """
+    Save the names and columns of a standard data file to its binary twin
+    file.
+    """
+    twin = path + '.npz'
+    try:
+        with open(twin, 'wb') as fl:
+            np.savez(fl, names=np.array(names), cols=cols)
+    except OSError:
+        pass
+
+
 def read_PSD_parameter_file(path):
     """
     Read a PSD parameter file.
@@ -79,7 +161,7 @@ def read_PSD_parameter_file(path):
     return defs
 
 
-def save_psd_data(path, freq, psd_dict):
+def save_psd_data(path, freq, psd_dict, binary=False):
     """
     Write psd data to a tab-separated data file.
 
@@ -92,20 +174,31 @@ def save_psd_data(path, freq, psd_dict):
     psd_dict : dict
         Dictionary that holds the data in arrays for each frequency value. The
         Keys are the names of the axes.
+    binary : bool
+        Additionally write the data to a binary twin file (path + '.npz'),
+        which is loaded by `read_std_data_file(path, cache=True)` instead of
+        parsing the data file. The twin file holds the same values as the
+        data file, i.e. rounded to 6 significant digits.
     """
     data = OrderedDict()
     data['freq'] = freq
     data.update(psd_dict)
     names = [name for name in data.keys()]
 
-    vals = array([a for a in data.values()]).transpose()
+    cols = np.array([a for a in data.values()], dtype=float)
 
+    # Format all rows at once with the format of a whole row
+    row = '\t'.join(['%1.5E'] * len(names)) + '\n'
+    text = (row * cols.shape[1]) % tuple(cols.transpose().ravel())
     with open(path, 'w') as fl:
         fl.write('\t'.join(names) + '\n')
+        fl.write(text)
 
-        for row in range(len(vals)):
-            s = ['{0:1.5E}'.format(si) for si in vals[row]]
-            fl.write('\t'.join(s) + '\n')
+    if binary:
+        # Store the values as written to the data file, to get the same
+        # values, regardless of whether the twin file is read or not
+        rounded = np.fromstring(text, sep=' ').reshape(cols.shape[::-1])
+        _save_twin(path, names, rounded.transpose())
 
 
 def save_psd_params(path, param_dict, ac_param_dict=None):
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide management of the cached data of all Regions.
+
+Every Region with caching switched on keeps its data in the volatile attribute
+`_v_data_cached` or in tiles of its data in the volatile attribute `_v_tiles`.
+The cache manager keeps track of the size of the cached data and of the time
+it took to calculate it. If the cached arrays exceed the
+memory budget, the arrays of the Regions are evicted (i.e. deleted and
+recalculated, the next time they are requested), which are least valuable:
+The eviction follows the GreedyDual-Size strategy, where the value of a cached
+array is the time it took to calculate it per byte, increased by an aging
+value on every access. This means, arrays that were not used for a long time
+and arrays that are cheap to recalculate are evicted first.
+"""
+import threading
+import weakref
+import numpy as np
+
+
+class CacheManager(object):
+    """
+    Keep track of the cached data of Regions and evict the data, if the memory
+    budget is exceeded.
+
+    Memory mapped arrays (e.g. the on-disk cache of Records) are shared via the
+    page cache of the operating system and are not counted against the
+    budget.
+    """
+    def __init__(self, budget=None):
+        """
+        Parameters
+        ----------
+        budget : int, optional
+            The number of bytes the cached data of all Regions may occupy.
+            Defaults to None, which means no limit.
+        """
+        self._budget = budget
+        self._entries = {}
+        # Aging value of GreedyDual-Size
+        self._age = 0.0
+        self._lock = threading.RLock()
+        self.reset_stats()
+
+    @property
+    def budget(self):
+        """
+        The number of bytes the cached data of all Regions may occupy (None
+        means no limit).
+        """
+        return self._budget
+
+    @budget.setter
+    def budget(self, budget):
+        self._budget = budget
+        with self._lock:
+            self._evict()
+
+    @property
+    def nbytes(self):
+        """
+        The number of bytes occupied by the cached data of all Regions.
+        """
+        with self._lock:
+            return sum(entry[1] for entry in self._entries.values())
+
+    def add(self, region, cost=0.0, nbytes=None, extend=False):
+        """
+        Register the cached data of `region`, which took `cost` seconds to be
+        calculated, and evict the cached data of other Regions, if the budget
+        is exceeded.
+
+        Parameters
+        ----------
+        region : Region
+        cost : float, optional
+            The time in seconds it took to calculate the cached data.
+        nbytes : int, optional
+            The number of bytes of the cached data. Defaults to the size of
+            `region._v_data_cached`.
+        extend : bool, optional
+            Add `cost` and `nbytes` to the already registered cached data of
+            `region` (e.g. for newly calculated tiles), instead of replacing
+            it.
+        """
+        if nbytes is None:
+            data = region._v_data_cached
+            if data is None:
+                self.remove(region)
+                return
+            nbytes = 0 if isinstance(data, np.memmap) else data.nbytes
+        key = id(region)
+        with self._lock:
+            self.misses += 1
+            entry = self._entries.get(key)
+            if extend and entry is not None and entry[3]() is region:
+                cost += entry[2]
+                nbytes += entry[1]
+            ref = weakref.ref(region, self._make_callback(key))
+            self._entries[key] = [self._priority(cost, nbytes), nbytes, cost,
+                                  ref]
+            self._evict(keep=key)
+
+    def resize(self, region, nbytes):
+        """
+        Inform the manager about a changed size of the cached data of `region`
+        (e.g. after the cached data was shifted), without changing the cost of
+        the cached data.
+        """
+        with self._lock:
+            entry = self._entries.get(id(region))
+            if entry is None:
+                return
+            entry[1] = nbytes
+            entry[0] = self._priority(entry[2], nbytes)
+            self._evict(keep=id(region))
+
+    def touch(self, region):
+        """
+        Inform the manager about an access of the cached data of `region`.
+        """
+        with self._lock:
+            entry = self._entries.get(id(region))
+            if entry is not None:
+                self.hits += 1
+                entry[0] = self._priority(entry[2], entry[1])
+
+    def remove(self, region):
+        """
+        Forget about the cached data of `region` (e.g. after the cache was
+        deleted by the region itself).
+        """
+        with self._lock:
+            self._entries.pop(id(region), None)
+
+    def clear(self):
+        """
+        Evict the cached data of all Regions.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                self._evict_entry(key)
+            self._age = 0.0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """
+        Return the statistics of the cache.
+
+        Returns
+        -------
+        dict
+            Number of cache hits, misses, and evictions, number of Regions
+            with cached data, bytes occupied and budget.
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'regions': len(self._entries),
+                    'bytes': self.nbytes,
+                    'budget': self.budget}
+
+    def _priority(self, cost, nbytes):
+        return self._age + cost / max(nbytes, 1)
+
+    def _make_callback(self, key):
+        def callback(ref):
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[3] is ref:
+                    del self._entries[key]
+        return callback
+
+    def _evict(self, keep=None):
+        if self._budget is None:
+            return
+        nbytes = self.nbytes
+        while nbytes > self._budget:
+            candidates = [(entry[0], key)
+                          for key, entry in self._entries.items()
+                          if key != keep and entry[1] > 0]
+            if not candidates:
+                break
+            priority, key = min(candidates)
+            self._age = priority
+            nbytes -= self._entries[key][1]
+            self._evict_entry(key)
+            self.evictions += 1
+
+    def _evict_entry(self, key):
+        entry = self._entries.pop(key)
+        region = entry[3]()
+        if region is not None:
+            region._clear_cache()
+
+
+# The cache manager of all Regions of this process
+manager = CacheManager()
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Chunked, compressed container for 2D data with random access.
+
+The container is a zip file. Every trace (column) of the data is split into
+chunks of a fixed number of samples and every chunk is stored as a separately
+compressed member 't<trace>/c<chunk>'. The member 'index.json' holds the
+shape, the chunk size, the dtype and additional attributes of the data.
+Reading a window of the data decompresses only the chunks of the requested
+traces, which hold the requested samples.
+
+Before compression, the bytes of the values of a chunk can be shuffled
+(all first bytes, all second bytes, ...), which considerably improves the
+compression of floating point data with slowly varying values.
+"""
+import collections
+import json
+import threading
+import zipfile
+import numpy as np
+
+INDEX = 'index.json'
+VERSION = 1
+
+
+def _member(trace, chunk):
+    return 't%i/c%i' % (trace, chunk)
+
+
+def _encode(values, dtype, shuffle):
+    values = np.ascontiguousarray(values, dtype=dtype)
+    if shuffle:
+        values = values.view(np.uint8).reshape(-1, dtype.itemsize).T
+    return values.tobytes()
+
+
+def _decode(buffer, dtype, shuffle):
+    values = np.frombuffer(buffer, dtype=np.uint8)
+    if shuffle:
+        values = values.reshape(dtype.itemsize, -1).T.ravel()
+    return values.view(dtype)
+
+
+def write_chunked_data(filename, data, chunk_size=2**16, compresslevel=6,
+                       shuffle=True, attrs=None):
+    """
+    Write 2D data to a chunked container file.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the container file.
+    data : 2D numpy.ndarray, array-like, or Iterable of 2D numpy.ndarray
+        The data to be written. Array-like objects (e.g. `numpy.memmap` or
+        `LabViewBinArray`) are read chunk by chunk. An Iterable has to yield
+        blocks of `chunk_size` samples, except for the last block, which may
+        be shorter.
+    chunk_size : int, optional
+        The number of samples per chunk.
+    compresslevel : int, optional
+        The zlib compression level (0 to 9).
+    shuffle : bool, optional
+        Shuffle the bytes of the values before compression.
+    attrs : dict, optional
+        Additional JSON serializable attributes to be stored together with the
+        data (e.g. the samplingrate).
+    """
+    if hasattr(data, 'shape'):
+        blocks = (data[start:start + chunk_size]
+                  for start in range(0, data.shape[0], chunk_size))
+    else:
+        blocks = data
+
+    dtype = None
+    samples = 0
+    columns = None
+    with zipfile.ZipFile(filename, 'w', compression=zipfile.ZIP_DEFLATED,
+                         compresslevel=compresslevel) as zf:
+        for chunk, block in enumerate(blocks):
+            block = np.asarray(block)
+            if dtype is None:
+                dtype = np.dtype(block.dtype.str.replace('>', '<'))
+                columns = block.shape[1]
+            if block.shape[1] != columns:
+                raise ValueError("All blocks of the data need to have the same "
+                                 "number of columns!")
+            if samples % chunk_size != 0:
+                raise ValueError("Only the last block of the data may be "
+                                 "shorter than `chunk_size`!")
+            for trace in range(columns):
+                zf.writestr(_member(trace, chunk),
+                            _encode(block[:, trace], dtype, shuffle))
+            samples += block.shape[0]
+
+        index = {'version': VERSION,
+                 'shape': [samples, columns or 0],
+                 'chunk_size': chunk_size,
+                 'dtype': (dtype or np.dtype(float)).str,
+                 'shuffle': shuffle,
+                 'attrs': attrs or {}}
+        zf.writestr(INDEX, json.dumps(index))
+
+
+class ChunkedArray(object):
+    """
+    Read-only 2D view on the data of a chunked container file.
+
+    Indexing with (samples, traces) decompresses only the chunks holding the
+    requested samples of the requested traces. The most recently decompressed
+    chunks are kept in memory.
+    """
+    def __init__(self, filename, cached_chunks=64):
+        """
+        Parameters
+        ----------
+        filename : str
+            The path to the container file.
+        cached_chunks : int, optional
+            The number of decompressed chunks to be kept in memory.
+        """
+        self.filename = filename
+        self._zf = zipfile.ZipFile(filename, 'r')
+        index = json.loads(self._zf.read(INDEX).decode())
+        if index.get('version', 0) > VERSION:
+            raise ValueError("The file '%s' was written by a newer version."
+                             % filename)
+        self._shape = tuple(index['shape'])
+        self._chunk_size = index['chunk_size']
+        self._dtype = np.dtype(index['dtype'])
+        self._shuffle = index['shuffle']
+        self.attrs = index['attrs']
+        self._cached_chunks = cached_chunks
+        self._cache = collections.OrderedDict()
+        # ZipFile does not support concurrent reads
+        self._lock = threading.Lock()
+
+    def _chunk(self, trace, chunk):
+        """
+        Return the decompressed values of the chunk `chunk` of trace `trace`.
+        """
+        key = (trace, chunk)
+        with self._lock:
+            values = self._cache.get(key)
+            if values is not None:
+                self._cache.move_to_end(key)
+                return values
+            buffer = self._zf.read(_member(trace, chunk))
+            values = _decode(buffer, self._dtype, self._shuffle)
+            values.flags.writeable = False
+            self._cache[key] = values
+            if len(self._cache) > self._cached_chunks:
+                self._cache.popitem(last=False)
+        return values
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def ndim(self):
+        return 2
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[:, :]
+        if dtype is not None:
+            data = data.astype(dtype, copy=False)
+        return data
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        if len(key) != 2:
+            raise IndexError("Only 2 dimensional indexing is supported.")
+        samples, traces = key
+
+        # Normalize the traces to an index array
+        squeeze_traces = np.ndim(traces) == 0 and not isinstance(traces,
+                                                                 slice)
+        traces = np.atleast_1d(np.arange(self.shape[1])[traces])
+
+        # Normalize the samples to an index array or a range
+        rows = self.shape[0]
+        squeeze_samples = False
+        if isinstance(samples, slice):
+            samples = range(*samples.indices(rows))
+        else:
+            squeeze_samples = np.ndim(samples) == 0
+            samples = np.atleast_1d(np.asarray(samples, dtype=np.int64))
+            samples = np.where(samples < 0, samples + rows, samples)
+            if np.any(samples < 0) or np.any(samples >= rows):
+                raise IndexError("Sample index out of bounds for chunked data "
+                                 "with %i samples." % rows)
+
+        data = np.empty((len(samples), len(traces)), dtype=self.dtype)
+        if len(samples) > 0:
+            if isinstance(samples, range) and samples.step > 0:
+                self._get_range(samples, traces, data)
+            else:
+                self._get_index(np.asarray(samples), traces, data)
+
+        if squeeze_samples:
+            data = data[0]
+        if squeeze_traces:
+            data = data[..., 0]
+        return data
+
+    def _get_range(self, samples, traces, data):
+        start, stop, step = samples.start, samples.stop, samples.step
+        size = self._chunk_size
+        i = 0
+        for chunk in range(start // size, (stop - 1) // size + 1):
+            c_start = chunk * size
+            # First sample in this chunk, considering the step
+            s = start + max(0, -(-(c_start - start) // step)) * step
+            e = min(stop, c_start + size)
+            if s >= e:
+                continue
+            length = len(range(s, e, step))
+            for j, trace in enumerate(traces):
+                values = self._chunk(trace, chunk)
+                data[i:i + length, j] = values[s - c_start:e - c_start:step]
+            i += length
+
+    def _get_index(self, samples, traces, data):
+        chunks = samples // self._chunk_size
+        for chunk in np.unique(chunks):
+            selected = chunks == chunk
+            positions = samples[selected] - chunk * self._chunk_size
+            for j, trace in enumerate(traces):
+                values = self._chunk(trace, chunk)
+                data[selected, j] = values[positions]
+
+    def close(self):
+        self._zf.close()
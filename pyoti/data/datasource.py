@@ -4,6 +4,7 @@ Created on Thu Mar 10 19:13:51 2016
 
 @author: Tobias Jachowski
 """
+import numpy as np
 import os
 import persistent
 from functools import wraps
@@ -24,6 +25,12 @@ class DataSource(persistent.Persistent):
     name = 'Generic data source'
     samplingrate = 1000  # default 1000 Hz
     _needs_file = False
+    # Data read in advance, which is used once instead of calling
+    # `as_array()`, and the identity, the offset, conversion, and inversion,
+    # and the converted data of a new Record prepared from it (see
+    # `pyoti.region.record.prepare_record()`). ZODB volatile.
+    _v_preloaded = None
+    _v_prepared = None
 
     def __init__(self, filename, directory=None, root=None, **kwargs):
         if filename is not None:
@@ -37,12 +44,60 @@ class DataSource(persistent.Persistent):
             self._directory_orig = self._directory
             self._absdir_orig = absdir
 
-    def as_array():
+    def as_array(self):
         """
         This function must return a 2D numpy.ndarray, containing the data.
         """
         return None
 
+    def read(self, start=None, stop=None, traces=None):
+        """
+        Return a window of the data.
+
+        Subclasses, which are able to read parts of the data without reading
+        all of the data, should overwrite this method. Per default, the data
+        returned by `as_array()` is sliced.
+
+        Parameters
+        ----------
+        start : int, optional
+            The first sample to be read. Defaults to 0.
+        stop : int, optional
+            The sample to stop reading at (not included). Defaults to the
+            number of samples.
+        traces : slice or 1D numpy.ndarray of type int, optional
+            The index of the traces (columns) to be read. Defaults to all
+            traces.
+
+        Returns
+        -------
+        2D numpy.ndarray
+        """
+        if traces is None:
+            traces = slice(None)
+        data = self.as_array()
+        return np.asarray(data[start:stop, traces])
+
+    def stat(self):
+        """
+        Return the size and the modification time (ns) of the data file.
+
+        The returned tuple can be used to cheaply check whether the data file
+        has changed. If the DataSource does not need a file or the file can not
+        be accessed, None is returned.
+
+        Returns
+        -------
+        tuple of (int, int) or None
+        """
+        if not self._needs_file:
+            return None
+        try:
+            stat = os.stat(self.absfile)
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
     @property
     @if_needs_file
     def rootdir(self):
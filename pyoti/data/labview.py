@@ -5,8 +5,9 @@ Created on Fri Mar 11 15:04:15 2016
 @author: Tobias Jachowski
 """
 import numpy as np
-#import os
+import os
 import struct
+import warnings
 
 '''
 def get_labview_bin_data_shape(filename):
@@ -82,59 +83,479 @@ def chunk_info(filename):
             else:
                 break
 
+def chunk_table(filename, pos=0):
+    """
+    Get the position and the shape of all complete chunks of a LabVIEW binary
+    file.
+
+    Instead of seeking from header to header, the shape of the first chunk
+    is assumed for all following chunks and all of their headers are verified
+    at once. Only if the shape of the chunks changes, the following chunks
+    are analysed, separately.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the LabVIEW binary file.
+    pos : int, optional
+        Position (in units of 8 bytes) of the header of the first chunk to be
+        analysed.
+
+    Returns
+    -------
+    numpy.ndarray of type int and shape (N, 3)
+        Position of the first value (in units of 8 bytes), the number of rows
+        and the number of columns of every chunk, like `chunk_info()`. An
+        incomplete last chunk (e.g. of a file still being written) is omitted.
+    """
+    size = os.path.getsize(filename) // 8
+    chunks = [np.empty((0, 3), dtype=np.int64)]
+    if size == 0:
+        return chunks[0]
+
+    # Headers consist of two big-endian integers (rows and columns)
+    headers = np.memmap(filename, dtype='>i4', mode='r', shape=(size, 2))
+    while pos < size:
+        rows, columns = (int(v) for v in headers[pos])
+        length = rows * columns
+        if length <= 0:
+            pos += 1
+            continue
+        if pos + 1 + length > size:
+            # incomplete chunk
+            break
+
+        # Verify the headers of all chunks following with the same shape
+        positions = np.arange(pos, size - length, 1 + length)
+        shapes = headers[positions]
+        valid = np.logical_and(shapes[:, 0] == rows, shapes[:, 1] == columns)
+        number = int(np.argmin(valid)) if not np.all(valid) else len(valid)
+        positions = positions[:number]
+
+        chunk = np.empty((number, 3), dtype=np.int64)
+        chunk[:, 0] = positions + 1
+        chunk[:, 1] = rows
+        chunk[:, 2] = columns
+        chunks.append(chunk)
+        pos = int(positions[-1]) + 1 + length
+    del headers
+
+    return np.concatenate(chunks)
+
+
 def chunk_data(filename, chunks, dtype='>d'):
     with open(filename, "rb") as f:
         for chunk in chunks:
             f.seek(chunk[0] * 8)
             data_bin = f.read(chunk[1] * chunk[2] * 8)
-            data = np.fromstring(data_bin, dtype=dtype)
+            data = np.frombuffer(data_bin, dtype=dtype)
             yield data
 
-def read_labview_bin_data(filename, dtype='>d'):
-    rows = 0
-    columns = None
-    chunks = []
-
-    print('Getting chunk info from:')
-    print('  \'%s\'' % filename)
-    for chunk in chunk_info(filename):
-        c = chunk[2]
-        if columns == c or columns is None:
-            columns = c
-        else:
-            print("Number of columns in chunks of file differ from each other!")
-        rows += chunk[1]
-        chunks.append(chunk)
+def read_labview_bin_data(filename, dtype='>d', chunks=None):
+    if chunks is None:
+        print('Getting chunk info from:')
+        print('  \'%s\'' % filename)
+        chunks = chunk_table(filename)
 
     print('Reading data chunks from:')
     print('  \'%s\'' % filename)
-    data = np.empty(rows * columns)
-    i = 0
-    for _data in chunk_data(filename, chunks, dtype=dtype):
-        length = len(_data)
-        data[i:i + length] = _data
-        i += length
-
-    data = data.reshape(rows, columns)
-    
+    # Copy the chunks directly from the memory mapped file into the final
+    # array, without reading every chunk into an intermediary buffer first.
+    data = LabViewBinArray(filename, chunks, dtype=dtype, squeeze=False)
+    data = data[:, :]
+
     # Workaround, if last column is 0.0
     if np.all(data[:, -1] == 0.0):
         # kick out last column
         data = data[:, :-1]
-    
+
     return data
 
-def write_labview_bin_data(filename, array, dtype='d', endianness='>'):
 
-    i = struct.pack('>i', array.shape[0])
-    j = struct.pack('>i', array.shape[1])
-    fmt = endianness + dtype * array.size
-    data = struct.pack(fmt, *array.flatten())
+def zero_last_column(filename, chunks, dtype='>d'):
+    """
+    Check, whether the last column of a LabVIEW binary file contains only
+    zeros (see the workaround of `read_labview_bin_data()`).
+
+    The chunks are checked one after another, until the first chunk with a
+    value other than 0.0. If the last column contains only zeros, every chunk
+    of the file is read once.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the LabVIEW binary file.
+    chunks : numpy.ndarray
+        The chunk table of the file, as returned by `chunk_table()`.
+    dtype : str, optional
+        The dtype of the values stored in the file.
+
+    Returns
+    -------
+    bool
+    """
+    chunks = np.array(chunks, dtype=np.int64).reshape(-1, 3)
+    if len(chunks) == 0 or chunks[0, 2] < 2:
+        return False
+    values = np.memmap(filename, dtype=dtype, mode='r')
+    for pos, rows, columns in chunks:
+        chunk = values[pos:pos + rows * columns].reshape(rows, columns)
+        if np.any(chunk[:, -1] != 0.0):
+            return False
+    return True
+
+
+def memmap_labview_bin_data(filename, dtype='>d', chunks=None, squeeze=None):
+    """
+    Map the data of a LabVIEW binary file into memory, without reading it.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the LabVIEW binary file.
+    dtype : str, optional
+        The dtype of the values stored in the file (big-endian double,
+        default).
+    chunks : numpy.ndarray, optional
+        The chunk table of the file, as returned by `chunk_table()`. Defaults
+        to analysing the file.
+    squeeze : bool, optional
+        Hide the last column. Defaults to hiding the last column, if it
+        contains only zeros (see `zero_last_column()`).
+
+    Returns
+    -------
+    LabViewBinArray
+        Read-only 2D array-like object. Samples are read from the file, only
+        when they are indexed.
+    """
+    if chunks is None:
+        print('Getting chunk info from:')
+        print('  \'%s\'' % filename)
+        chunks = chunk_table(filename)
+
+    if squeeze is None:
+        squeeze = zero_last_column(filename, chunks, dtype=dtype)
+
+    print('Mapping data chunks from:')
+    print('  \'%s\'' % filename)
+    return LabViewBinArray(filename, chunks, dtype=dtype, squeeze=squeeze)
+
+
+# Lookup table of the whitespace characters of bytes
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(b' \t\r\n\v\f')] = True
+
+
+def _rectangular(block, columns, values):
+    """
+    Check, whether every non-empty line of the text `block` consists of
+    `columns` fields and `values` (the number of parsed values) matches.
+    """
+    text = np.frombuffer(block, dtype=np.uint8)
+    space = _WHITESPACE[text]
+    # First characters of the fields and the line they belong to, i.e. the
+    # number of line breaks before them
+    first = ~space
+    first[1:] &= space[:-1]
+    breaks = np.flatnonzero(text == ord('\n'))
+    line = np.searchsorted(breaks, np.flatnonzero(first))
+    fields = np.bincount(line)
+    fields = fields[fields > 0]
+    return np.all(fields == columns) and len(fields) * columns == values
+
+
+def read_labview_txt_data(filename, skiprows=5, chunk_size=2**25):
+    """
+    Read the whitespace separated values of a LabVIEW text file.
+
+    The file is read in blocks of lines of about `chunk_size` bytes and every
+    block is parsed at once by numpy. If the file can not be parsed this way,
+    it is parsed with `numpy.loadtxt()`.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the LabVIEW text file.
+    skiprows : int, optional
+        The number of header lines to skip.
+    chunk_size : int, optional
+        The number of bytes to be read and parsed at once.
+
+    Returns
+    -------
+    2D numpy.ndarray
+    """
+    columns = None
+    blocks = []
+    rest = b''
+    try:
+        with open(filename, 'rb') as f, warnings.catch_warnings():
+            # Let numpy raise an error on text that is not a number, instead
+            # of silently returning the values parsed so far
+            warnings.simplefilter('error', DeprecationWarning)
+            for i in range(skiprows):
+                f.readline()
+            while True:
+                block = f.read(chunk_size)
+                if not block:
+                    block, rest = rest, b''
+                else:
+                    block = rest + block
+                    cut = block.rfind(b'\n') + 1
+                    block, rest = block[:cut], block[cut:]
+                if columns is None:
+                    lines = block.split(b'\n')
+                    first = next((line for line in lines if line.strip()),
+                                 None)
+                    if first is not None:
+                        columns = len(first.split())
+                if block.strip():
+                    values = np.fromstring(block, sep=' ')
+                    if not _rectangular(block, columns, len(values)):
+                        raise ValueError("Rows with a differing number of "
+                                         "values.")
+                    blocks.append(values)
+                if not block and not rest:
+                    break
+        data = np.concatenate(blocks)
+        data = data.reshape(-1, columns)
+    except (ValueError, TypeError, DeprecationWarning):
+        data = np.loadtxt(filename, skiprows=skiprows, ndmin=2)
+    return data
+
+
+def load_shadow(filename):
+    """
+    Memory map the binary shadow file of `filename` (see `save_shadow()`),
+    if it exists and is newer than `filename`.
+
+    Returns
+    -------
+    numpy.memmap or None
+        Read-only data of the shadow file or None, if there is no valid shadow
+        file.
+    """
+    shadow = ''.join([filename, '.npy'])
+    try:
+        if os.path.getmtime(shadow) < os.path.getmtime(filename):
+            return None
+        return np.load(shadow, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+
+
+def save_shadow(filename, data):
+    """
+    Save `data` read from `filename` to the binary shadow file
+    `filename` + '.npy', which can be memory mapped by `load_shadow()`.
+
+    Returns
+    -------
+    bool
+        True, if the shadow file could be saved.
+    """
+    shadow = ''.join([filename, '.npy'])
+    tmpfile = '%s.%d.tmp' % (shadow, os.getpid())
+    try:
+        with open(tmpfile, 'wb') as f:
+            np.save(f, data)
+        os.replace(tmpfile, shadow)
+    except OSError:
+        try:
+            os.remove(tmpfile)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+class LabViewBinArray(object):
+    """
+    Read-only, zero-copy 2D view on the samples of a LabVIEW binary file.
+
+    The file is memory mapped and every chunk is represented by a strided view
+    of the big-endian values, skipping the 8 byte chunk headers. Indexing with
+    (samples, traces) copies only the requested samples into a new (native
+    endian) numpy.ndarray, i.e. only the pages of the file holding the
+    requested samples are read from disk.
+    """
+    def __init__(self, filename, chunks, dtype='>d', squeeze=False):
+        """
+        Parameters
+        ----------
+        filename : str
+            The path to the LabVIEW binary file.
+        chunks : Iterable of (int, int, int)
+            Position of the first value (in units of values), the number of
+            rows and the number of columns of every chunk, as returned by the
+            functions `chunk_table()` or `chunk_info()`.
+        dtype : str, optional
+            The dtype of the values stored in the file.
+        squeeze : bool, optional
+            Hide the last column (e.g. a column containing only zeros, see
+            `zero_last_column()`). The data of the file is not read to decide
+            this.
+        """
+        chunks = np.array(chunks, dtype=np.int64).reshape(-1, 3)
+        if len(chunks) == 0:
+            raise ValueError("The file '%s' does not contain any data chunks!"
+                             % filename)
+        columns = chunks[0, 2]
+        if np.any(chunks[:, 2] != columns):
+            raise ValueError("Number of columns in chunks of file '%s' differ "
+                             "from each other!" % filename)
+
+        self.filename = filename
+        self._mmap = np.memmap(filename, dtype=dtype, mode='r')
+        self._chunks = chunks
+        self._columns = columns
+        # Index of the first row of every chunk and total number of rows
+        self._starts = np.concatenate(([0], np.cumsum(chunks[:, 1])))
+
+        # Workaround, if last column is 0.0
+        num_traces = columns
+        if squeeze and columns > 1:
+            num_traces -= 1
+        self._num_traces = num_traces
+
+    def _chunk(self, i):
+        """
+        Return a read-only view on the data of chunk `i`.
+        """
+        pos, rows, columns = self._chunks[i]
+        chunk = self._mmap[pos:pos + rows * columns].reshape(rows, columns)
+        chunk.flags.writeable = False
+        return chunk
+
+    @property
+    def shape(self):
+        return (int(self._starts[-1]), int(self._num_traces))
+
+    @property
+    def ndim(self):
+        return 2
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def dtype(self):
+        return np.dtype(float)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[:, :]
+        if dtype is not None:
+            data = data.astype(dtype, copy=False)
+        return data
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        if len(key) != 2:
+            raise IndexError("Only 2 dimensional indexing is supported.")
+        samples, traces = key
+
+        # Normalize the traces to an index array
+        if isinstance(traces, slice):
+            traces = np.arange(self._num_traces)[traces]
+            squeeze_traces = False
+        else:
+            squeeze_traces = np.ndim(traces) == 0
+            traces = np.atleast_1d(np.arange(self._num_traces)[traces])
+
+        rows = self.shape[0]
+        if isinstance(samples, slice):
+            data = self._get_slice(samples.indices(rows), traces)
+            squeeze_samples = False
+        else:
+            squeeze_samples = np.ndim(samples) == 0
+            samples = np.atleast_1d(np.asarray(samples, dtype=np.int64))
+            samples = np.where(samples < 0, samples + rows, samples)
+            if np.any(samples < 0) or np.any(samples >= rows):
+                raise IndexError("Sample index out of bounds for LabVIEW data "
+                                 "with %i samples." % rows)
+            data = self._get_index(samples, traces)
+
+        if squeeze_samples:
+            data = data[0]
+        if squeeze_traces:
+            data = data[..., 0]
+        return data
+
+    def _get_slice(self, indices, traces):
+        start, stop, step = indices
+        num = len(range(start, stop, step))
+        data = np.empty((num, len(traces)))
+        if num == 0:
+            return data
+        if step < 0:
+            # Read in ascending order and reverse afterwards
+            last = start + (num - 1) * step
+            data[::-1] = self._get_slice((last, start + 1, -step), traces)
+            return data
+
+        # Copy the requested samples chunk by chunk
+        first = np.searchsorted(self._starts, start, side='right') - 1
+        last = np.searchsorted(self._starts, stop - 1, side='right') - 1
+        i = 0
+        for c in range(first, last + 1):
+            c_start = self._starts[c]
+            c_stop = self._starts[c + 1]
+            # First sample in this chunk, considering the step
+            s = start + max(0, -(-(c_start - start) // step)) * step
+            if s >= c_stop:
+                continue
+            e = min(stop, c_stop)
+            chunk = self._chunk(c)[s - c_start:e - c_start:step]
+            length = len(chunk)
+            data[i:i + length] = chunk[:, traces]
+            i += length
+        return data
+
+    def _get_index(self, samples, traces):
+        # Determine the chunk and the position of the value of the first trace
+        # of every sample within the memory mapped file
+        chunk = np.searchsorted(self._starts, samples, side='right') - 1
+        pos = (self._chunks[chunk, 0]
+               + (samples - self._starts[chunk]) * self._columns)
+        return np.asarray(self._mmap[pos[:, np.newaxis] + traces], dtype=float)
+
+
+def write_labview_bin_data(filename, array, dtype='d', endianness='>',
+                           chunk_size=None):
+    """
+    Write a 2D array to a LabVIEW binary file.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the LabVIEW binary file.
+    array : 2D numpy.ndarray
+        The data to be written. Rows are samples, columns are traces.
+    dtype : str, optional
+        The type of the values stored in the file (double, default).
+    endianness : str, optional
+        The byte order of the values stored in the file (big-endian, default).
+    chunk_size : int, optional
+        The number of samples (rows) per chunk. Defaults to writing all
+        samples in one chunk. Only one chunk at a time is converted to the
+        type of the file.
+    """
+    array = np.asarray(array)
+    dtype = np.dtype(endianness + dtype)
+    rows = array.shape[0]
+    chunk_size = chunk_size or max(rows, 1)
 
     with open(filename, 'wb') as f:
-        f.write(i)
-        f.write(j)
-        f.write(data)
+        for start in range(0, max(rows, 1), chunk_size):
+            chunk = array[start:start + chunk_size]
+            np.array(chunk.shape, dtype='>i4').tofile(f)
+            np.ascontiguousarray(chunk, dtype=dtype).tofile(f)
 
 '''
 def convert_bin_data(fname_i, fname_o, chunk_size, chunk_shape_size=1):
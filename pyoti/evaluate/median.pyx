@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# cython: boundscheck=False, wraparound=False, cdivision=True
+"""
+Running median of sliding windows.
+
+The values of the current window are kept in two heaps: a max-heap with the
+`window // 2` smallest values and a min-heap with the remaining values, whose
+root is the median. When the window slides by one sample, the value of the
+oldest sample is replaced in place by the value of the new sample and both
+heaps are repaired, which costs O(log(window)) per sample.
+"""
+from libc.stdlib cimport malloc, free, qsort
+
+
+cdef struct Pair:
+    double value
+    Py_ssize_t slot
+
+
+cdef int _compare(const void *a, const void *b) noexcept nogil:
+    cdef double va = (<Pair *> a).value
+    cdef double vb = (<Pair *> b).value
+    return (va > vb) - (va < vb)
+
+
+cdef inline bint _before(double *val, Py_ssize_t a, Py_ssize_t b,
+                         bint maxheap) noexcept nogil:
+    # Should slot `a` be closer to the root than slot `b`?
+    if maxheap:
+        return val[a] > val[b]
+    return val[a] < val[b]
+
+
+cdef void _sift_up(Py_ssize_t *heap, Py_ssize_t *where, double *val,
+                   Py_ssize_t base, Py_ssize_t i, bint maxheap) noexcept nogil:
+    cdef Py_ssize_t parent
+    cdef Py_ssize_t slot = heap[base + i]
+    while i > 0:
+        parent = (i - 1) // 2
+        if not _before(val, slot, heap[base + parent], maxheap):
+            break
+        heap[base + i] = heap[base + parent]
+        where[heap[base + i]] = base + i
+        i = parent
+    heap[base + i] = slot
+    where[slot] = base + i
+
+
+cdef void _sift_down(Py_ssize_t *heap, Py_ssize_t *where, double *val,
+                     Py_ssize_t base, Py_ssize_t size, Py_ssize_t i,
+                     bint maxheap) noexcept nogil:
+    cdef Py_ssize_t child
+    cdef Py_ssize_t slot = heap[base + i]
+    while True:
+        child = 2 * i + 1
+        if child >= size:
+            break
+        if child + 1 < size and _before(val, heap[base + child + 1],
+                                        heap[base + child], maxheap):
+            child += 1
+        if not _before(val, heap[base + child], slot, maxheap):
+            break
+        heap[base + i] = heap[base + child]
+        where[heap[base + i]] = base + i
+        i = child
+    heap[base + i] = slot
+    where[slot] = base + i
+
+
+cdef void _replace(Py_ssize_t *heap, Py_ssize_t *where, double *val,
+                   Py_ssize_t window, Py_ssize_t rank, Py_ssize_t slot,
+                   double value) noexcept nogil:
+    # Replace the value of `slot` and restore both heaps. The lower max-heap
+    # occupies heap[0:rank], the upper min-heap heap[rank:window].
+    cdef Py_ssize_t a, b
+    val[slot] = value
+    if where[slot] < rank:
+        _sift_up(heap, where, val, 0, where[slot], True)
+        _sift_down(heap, where, val, 0, rank, where[slot], True)
+    else:
+        _sift_up(heap, where, val, rank, where[slot] - rank, False)
+        _sift_down(heap, where, val, rank, window - rank, where[slot] - rank,
+                   False)
+    # Only one value changed, therefore exchanging the roots once suffices
+    # to keep all values of the lower heap <= all values of the upper heap
+    if rank > 0 and val[heap[0]] > val[heap[rank]]:
+        a = heap[0]
+        b = heap[rank]
+        heap[0] = b
+        where[b] = 0
+        heap[rank] = a
+        where[a] = rank
+        _sift_down(heap, where, val, 0, rank, 0, True)
+        _sift_down(heap, where, val, rank, window - rank, 0, False)
+
+
+def running_median(const double[:, :] data, Py_ssize_t window,
+                   const Py_ssize_t[:] points, double[:, :] out):
+    """
+    Calculate the medians of the windows [point, point + `window`) of all
+    columns of `data` and store them in `out`.
+
+    Like `scipy.ndimage.median_filter()`, the upper median (rank
+    `window` // 2) is taken for even windows. The windows are slid from point
+    to point, i.e. the work is O(n * log(window)) for the n samples between
+    the first and the last point. Ascending points are the most efficient.
+
+    Parameters
+    ----------
+    data : 2D numpy.ndarray of type float
+        The data with the samples along the first axis.
+    window : int
+        The window size. Every window needs to lie within `data`.
+    points : 1D numpy.ndarray of type numpy.intp
+        The first samples of the windows.
+    out : 2D numpy.ndarray of type float
+        Array with shape (len(`points`), `data.shape[1]`) the medians are
+        stored in.
+    """
+    cdef Py_ssize_t samples = data.shape[0]
+    cdef Py_ssize_t columns = data.shape[1]
+    cdef Py_ssize_t npoints = points.shape[0]
+    cdef Py_ssize_t rank = window // 2
+    cdef Py_ssize_t i, j, k, p, pos
+
+    if window < 1:
+        raise ValueError("The window needs to be at least 1.")
+    if out.shape[0] != npoints or out.shape[1] != columns:
+        raise ValueError("The shape of `out` does not match the data.")
+    for k in range(npoints):
+        if points[k] < 0 or points[k] + window > samples:
+            raise IndexError("All windows need to lie within the data.")
+
+    cdef Py_ssize_t *heap = <Py_ssize_t *> malloc(window * sizeof(Py_ssize_t))
+    cdef Py_ssize_t *where = <Py_ssize_t *> malloc(window
+                                                   * sizeof(Py_ssize_t))
+    cdef double *val = <double *> malloc(window * sizeof(double))
+    cdef Pair *pairs = <Pair *> malloc(window * sizeof(Pair))
+    if heap == NULL or where == NULL or val == NULL or pairs == NULL:
+        free(heap)
+        free(where)
+        free(val)
+        free(pairs)
+        raise MemoryError()
+
+    try:
+        with nogil:
+            for j in range(columns):
+                pos = -1
+                for k in range(npoints):
+                    p = points[k]
+                    if pos < 0 or p < pos or p - pos >= window:
+                        # (Re)build the heaps from the sorted window. The
+                        # slot of sample i is i % window.
+                        for i in range(window):
+                            pairs[i].value = data[p + i, j]
+                            pairs[i].slot = (p + i) % window
+                            val[pairs[i].slot] = pairs[i].value
+                        qsort(pairs, window, sizeof(Pair), _compare)
+                        # A descending array is a max-heap, an ascending
+                        # array a min-heap
+                        for i in range(rank):
+                            heap[i] = pairs[rank - 1 - i].slot
+                        for i in range(rank, window):
+                            heap[i] = pairs[i].slot
+                        for i in range(window):
+                            where[heap[i]] = i
+                    else:
+                        # Slide the window from `pos` to `p`
+                        for i in range(pos + window, p + window):
+                            _replace(heap, where, val, window, rank,
+                                     i % window, data[i, j])
+                    pos = p
+                    out[k, j] = val[heap[rank]]
+    finally:
+        free(heap)
+        free(where)
+        free(val)
+        free(pairs)
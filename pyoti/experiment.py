@@ -6,17 +6,21 @@ Created on Fri Feb 14 11:50:29 2014
 """
 import collections
 import getpass
+import itertools
 import os
 import shutil
 import tempfile
 import transaction
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps, update_wrapper
 from zc.lockfile import LockError
 from ZODB import FileStorage, DB
 from ZODB.POSException import ConnectionStateError
 
+from . import cache as ch
 from . import config as cf
 from . import helpers as hp
+from . import parallel as pl
 from . import update
 from . import version
 from .calibration import calibration as cb
@@ -220,6 +224,11 @@ class Experiment(object):
         # volatile, so that ZODB doesn't store it.
         filename, absdir, absfile = hp.file_and_dir(self.filename)
         self._graphroot._v_absdir = absdir
+        self._set_cachedir()
+        if 'cache_budget_bytes' in self._status:
+            self.cache.budget = self._status.cache_budget_bytes
+        if 'parallel_workers' in self._status:
+            pl.pool.workers = self._status.parallel_workers
 
         # Update the database of an experiment file created with an old version
         update.update_db(self)
@@ -266,6 +275,87 @@ class Experiment(object):
             self._dbroot['version'] = version()
             autosave and self._save(description="Add version")
 
+    @property
+    @if_closed_return()
+    def cachedir(self):
+        """
+        The directory the converted data of the records is cached in on disk,
+        to speed up reopening of the experiment file. The directory is located
+        next to the experiment file.
+        """
+        return ''.join([self.filename, '.cache'])
+
+    @property
+    def diskcache(self):
+        """
+        Cache the converted data of the records on disk (see `cachedir`).
+        Defaults to True.
+        """
+        if self.is_open and 'diskcache_enabled' in self._status:
+            return self._status.diskcache_enabled
+        return True
+
+    @diskcache.setter
+    @if_open
+    def diskcache(self, diskcache):
+        self._status.diskcache_enabled = bool(diskcache)
+        self._set_cachedir()
+
+    def _set_cachedir(self):
+        # Make the attribute volatile, so that ZODB doesn't store it.
+        if self.diskcache:
+            self._graphroot._v_cachedir = self.cachedir
+        else:
+            self._graphroot._v_cachedir = None
+
+    @if_open
+    def clear_diskcache(self):
+        """
+        Delete all data cached on disk (see `cachedir`).
+        """
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    @property
+    def cache(self):
+        """
+        The manager of the data cached in memory by the regions (see
+        `pyoti.cache.CacheManager`). Use `cache.stats()` to get the number of
+        cache hits, misses, evictions, and the bytes occupied by the cache.
+        """
+        return ch.manager
+
+    @property
+    def cache_budget(self):
+        """
+        The number of bytes the data cached in memory by all regions may
+        occupy. If the budget is exceeded, the caches of the regions, which
+        were not used for a long time and are cheap to recalculate, are
+        evicted. Defaults to None, i.e. no limit.
+        """
+        return self.cache.budget
+
+    @cache_budget.setter
+    def cache_budget(self, budget):
+        self.cache.budget = budget
+        if self.is_open:
+            self._status.cache_budget_bytes = budget
+
+    @property
+    def workers(self):
+        """
+        The number of threads large data requests are split into and
+        requested in parallel (see `pyoti.parallel`). Defaults to 1, i.e. no
+        parallel execution. Parallel execution can be switched off for
+        individual regions with `region.parallel = False`.
+        """
+        return pl.pool.workers
+
+    @workers.setter
+    def workers(self, workers):
+        pl.pool.workers = workers
+        if self.is_open:
+            self._status.parallel_workers = pl.pool.workers
+
     @if_closed_return(True)
     def close(self, verbose=True, discard_temp=True):
         """
@@ -360,17 +450,9 @@ class Experiment(object):
 
         # create a new record with name and group
         if record is None:
-            # Create a standard calibration
-            if calibration is None:
-                calibration = create_calibration()
-
-            if isinstance(calibration, CalibrationSource):
-                calibration = Calibration(calibration)
-
-            # create the record
-            record = rc.create_record(calibration, name=name, group=group,
-                                      cfgfile=cfgfile, root=self._graphroot,
-                                      **kwargs)
+            record = self._create_record(name=name, group=group,
+                                         calibration=calibration,
+                                         cfgfile=cfgfile, **kwargs)
 
         # record could not be created
         if record is None:
@@ -383,6 +465,124 @@ class Experiment(object):
 
         return record
 
+    def _create_record(self, name, group, calibration=None, cfgfile=None,
+                       **kwargs):
+        calibration = self._record_calibration(calibration)
+
+        # create the record
+        return rc.create_record(calibration, name=name, group=group,
+                                cfgfile=cfgfile, root=self._graphroot,
+                                **kwargs)
+
+    def _record_calibration(self, calibration=None):
+        # Create a standard calibration
+        if calibration is None:
+            calibration = create_calibration()
+
+        if isinstance(calibration, CalibrationSource):
+            calibration = Calibration(calibration)
+
+        return calibration
+
+    @if_open
+    def create_records(self, records, workers=None, auto_add=True, **kwargs):
+        """
+        Open existing or create multiple new `Record`s in parallel.
+
+        The data of the new records is read, verified, and converted in a
+        pool of threads (see `pyoti.region.record.prepare_record()`). The
+        records themselves are created and added to this `Experiment`
+        serially in the calling thread, in the order of `records`, because
+        all records share the database connection of this `Experiment`.
+
+        Parameters
+        ----------
+        records : Iterable of dict
+            Keyword arguments for every `Record` to be created. See
+            `create_record()` for the possible arguments. Every dict needs to
+            have at least the key 'name'.
+        workers : int, optional
+            The number of threads used to prepare the data of the records.
+            Defaults to the number of processors.
+        auto_add : bool, optional
+            If `auto_add` == True, the new records are automatically added to
+            this `Experiment` by calling `add_record()`.
+        **kwargs
+            Keyword arguments common to all records. The arguments given in
+            `records` take precedence.
+
+        Returns
+        -------
+        list of Record
+            The records in the order of `records`. If a record could not be
+            created, its entry is None.
+        """
+        specs = []
+        for spec in records:
+            spec = dict(kwargs, **spec)
+            spec['group'] = spec.get('group') or spec['name']
+            spec.pop('auto_add', None)
+            specs.append(spec)
+
+        # Try to find already created records
+        records = [self.record(name=spec['name'], group=spec['group'])
+                   for spec in specs]
+
+        # Read the configfiles and create the datasources of the missing
+        # records
+        arguments = []
+        for record, spec in zip(records, specs):
+            if record is not None:
+                arguments.append(None)
+                continue
+            spec = dict(spec)
+            spec.pop('calibration', None)
+            spec.pop('group')
+            arguments.append(rc.record_arguments(root=self._graphroot,
+                                                 **spec))
+
+        # Read, verify, and convert the data of the missing records in
+        # parallel. The threads use numpy and the file system, only, and do
+        # not touch any object of the database connection. At most `workers`
+        # records are prepared ahead, to limit the memory needed.
+        def prepare(i):
+            rc.prepare_record(arguments[i], name=specs[i]['name'],
+                              group=specs[i]['group'])
+
+        workers = workers or os.cpu_count()
+        missing = iter([i for i, args in enumerate(arguments)
+                        if args is not None])
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {i: executor.submit(prepare, i)
+                       for i in itertools.islice(missing, workers)}
+
+            # Create and add the records serially, in the order of `records`
+            for i, record in enumerate(records):
+                if i in futures:
+                    futures.pop(i).result()
+                    rc_class, datasource, traces, record_pars = arguments[i]
+                    arguments[i] = None
+                    calibration = self._record_calibration(
+                        specs[i].get('calibration'))
+                    record = rc_class(datasource, traces, calibration,
+                                      name=specs[i]['name'],
+                                      group=specs[i]['group'], **record_pars)
+                    records[i] = record
+                    # The prepared data has been taken over by the record
+                    for j in itertools.islice(missing, 1):
+                        futures[j] = executor.submit(prepare, j)
+
+                # record could not be created
+                if record is None:
+                    print("Could not create record '%s'" % specs[i]['name'])
+                    continue
+
+                # automatically add the record to this experiment
+                if auto_add:
+                    records[i] = self.add_record(record=record)
+
+        return records
+
     @if_open
     def add_record(self, record=None, set_last_added_region=True):
         """
@@ -700,9 +900,10 @@ class Experiment(object):
             # traces = traces or view.traces
             if description is None:
                 description = view.name
-            self._grs.init_ifig(view.timevector,
-                                view.get_data(traces=traces, copy=False),
-                                view.samplingrate,
+            timevector, data = self._grs.plot_data(view, traces=traces)
+            self._grs.init_ifig(timevector,
+                                data,
+                                None,
                                 traces,
                                 xlim=xlim,
                                 description=description,
@@ -745,10 +946,11 @@ class Experiment(object):
             # traces = traces or view.traces
             if description is None:
                 description = view.name
-            self._grs.init_ifig(view.parent.timevector,
-                                view.parent.get_data(traces=traces,
-                                                     copy=False),
-                                view.parent.samplingrate,
+            timevector, data = self._grs.plot_data(view.parent,
+                                                   traces=traces)
+            self._grs.init_ifig(timevector,
+                                data,
+                                None,
                                 traces,
                                 tmin=view.tmin,
                                 tmax=view.tmax,
@@ -1746,6 +1948,9 @@ class Experiment(object):
                   % (old_absfile, absfile))
             # Move/rename experiment file to new location
             shutil.move(old_absfile, absfile)
+            if os.path.isdir(''.join([old_absfile, '.cache'])):
+                shutil.move(''.join([old_absfile, '.cache']),
+                            ''.join([absfile, '.cache']))
         except:
             # File could not be moved, revert everything
             self.open(filename=old_absfile, verbose=False)
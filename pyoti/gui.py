@@ -26,6 +26,9 @@ class GRS(object):
         The current figure.
     displayrate : float
         Resolution of the plotted data in Hz.
+    displaywidth : int
+        Number of bins (min/max pairs) the data of a region is reduced to by
+        `plot_data()`.
     """
 
     def __init__(self, **kwargs):
@@ -48,6 +51,7 @@ class GRS(object):
         self._minspan = 0.1  # s
         self._pre_title = "Select timespan (leftclick, draw, release)"
         self.displayrate = 1000.0  # display max 1000.0 datapoints per second
+        self.displaywidth = 2000  # display max 2000 min/max pairs per axis
         self._onselect_callbacks = []
         self._spanselector = {}
         self._axspan = {}
@@ -96,6 +100,41 @@ class GRS(object):
             return True
         return False
 
+    def _decimate(self, samplingrate):
+        if samplingrate is None:
+            return 1
+        return max(1, int(np.round(samplingrate / self.displayrate)))
+
+    def plot_data(self, region, traces=None, tmin=None, tmax=None):
+        """
+        Get the data of a region reduced to an envelope of at most about
+        2 * `self.displaywidth` bins for plotting (see
+        `Region.get_envelope()`). The minimum and maximum of every bin are
+        interleaved, so that the plotted line covers the full range of the
+        data, independent of the length of the region.
+
+        Parameters
+        ----------
+        region : Region
+        traces : str or list of str, optional
+        tmin : float, optional
+        tmax : float, optional
+
+        Returns
+        -------
+        timevector : 1D numpy.ndarray
+        data : 2D numpy.ndarray
+            To be plotted with `samplingrate` None.
+        """
+        timevector, mins, maxs, means = region.get_envelope(
+            tmin=tmin, tmax=tmax, width=self.displaywidth, traces=traces)
+        if mins is maxs:
+            # The data was not reduced
+            return timevector, mins
+        timevector = np.repeat(timevector, 2)
+        data = np.stack((mins, maxs), axis=1).reshape(-1, mins.shape[1])
+        return timevector, data
+
     def _ifigure(self, timevector, data, samplingrate, traces, tmin=None,
                  tmax=None, xlim=None, description=None):
         """
@@ -112,8 +151,9 @@ class GRS(object):
             1D array with the timevector to plot
         data : np.array
             The data array containing the traces to plot
-        samplingrate : float
-            The samplingrate of the data in Hz
+        samplingrate : float or None
+            The samplingrate of the data in Hz. None plots all given
+            datapoints (e.g. the data returned by `plot_data()`).
         traces : list of str
             List with names of traces to use for data, COLOR and NAME
         tmin : float, optional
@@ -152,7 +192,7 @@ class GRS(object):
         if xlim is None:
             xlim = (timevector[0], timevector[-1])
 
-        decimate = max(1, int(np.round(samplingrate / self.displayrate)))
+        decimate = self._decimate(samplingrate)
 
         # plot traces
         for i, trace in enumerate(traces):
@@ -202,10 +242,11 @@ class GRS(object):
         timevector : array
             The timeline of the data.
         data : 2D array
-            The data to be plotted.
-        samplingrate : float
-            The samplingrate of the data in Hz. Data needs to have as many
-            traces as the data that is currently plotted in `self.ifigure`.
+            The data to be plotted. Data needs to have as many traces as the
+            data that is currently plotted in `self.ifigure`.
+        samplingrate : float or None
+            The samplingrate of the data in Hz or None to plot all given
+            datapoints.
         traces : str or list of str
             The traces contained in the data. `traces` has to contain the same
             traces as the data that is currently plotted in `self.ifigure`.
@@ -216,7 +257,7 @@ class GRS(object):
         traces = tc.normalize(traces)
         ax = dict(list(zip(traces, self.ifigure.axes)))
 
-        decimate = max(1, int(np.round(samplingrate / self.displayrate)))
+        decimate = self._decimate(samplingrate)
 
         if xlim is None:
             xlim = (timevector[0], timevector[-1])
@@ -286,8 +327,9 @@ class GRS(object):
             1D array with the timevector to plot
         data : np.array
             The data array containing the traces to plot
-        samplingrate : float
-            The samplingrate of the data in Hz
+        samplingrate : float or None
+            The samplingrate of the data in Hz. None plots all given
+            datapoints (e.g. the data returned by `plot_data()`).
         traces : list of str
             List with names of traces to use for data, COLOR and NAME
         tmin : float, optional
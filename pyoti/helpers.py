@@ -16,6 +16,7 @@ except ImportError:
 import sys
 from scipy.ndimage import convolve1d
 from scipy.ndimage import median_filter
+from numpy.lib.stride_tricks import sliding_window_view
 
 
 if sys.platform == "linux" or sys.platform == "linux2":
@@ -25,6 +26,9 @@ elif sys.platform == "darwin":
 elif sys.platform == "win32":
     platform = 'win32'
 
+# Compiled running median, see `running_median_engine()`
+_running_median = None
+
 
 def get_png_image(figure):
     figure.canvas.draw()
@@ -160,6 +164,11 @@ def movingmean(data, window, mode='reflect', cval=0.0, origin=0):
 
 
 def movingmedian(data, window, mode='reflect', cval=0.0, origin=0):
+    if (mode == 'reflect' and origin == 0 and data.ndim <= 2
+            and len(data) > 0 and running_median_engine() is not None):
+        # O(n * log(window)) instead of O(n * window) of median_filter()
+        return moving_filter_points(data, window, slice(None),
+                                    moving_filter='median')
     if data.ndim == 1:
         size = window
     else:
@@ -168,6 +177,148 @@ def movingmedian(data, window, mode='reflect', cval=0.0, origin=0):
     return smm
 
 
+def running_median_engine():
+    """
+    Return the compiled running median (see `pyoti.evaluate.median`), or None
+    if it is not available (e.g. because Cython or a C compiler is missing).
+    The module is compiled with pyximport upon the first call.
+    """
+    global _running_median
+    if _running_median is None:
+        try:
+            import pyximport
+            pyximport.install()
+            from .evaluate.median import running_median
+            _running_median = running_median
+        except Exception:
+            print("Could not compile the running median, falling back to "
+                  "scipy.ndimage.median_filter().")
+            _running_median = False
+    return _running_median or None
+
+
+def moving_filter_points(data, window, points, moving_filter='mean'):
+    """
+    Apply a moving filter to data, but only calculate the filtered values at
+    the given points.
+
+    The result is the same as `moving_filter(data, window, moving_filter)
+    [points]` (with mode 'reflect'), but the work is proportional to the number
+    of points times the window size, instead of the number of samples of
+    `data` times the window size. This makes filtering with subsequent
+    decimation considerably faster. Medians of overlapping windows are
+    calculated with the running median engine (see
+    `running_median_engine()`) in O(n * log(window)) for the n samples
+    spanned by the points.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        The data to be filtered (along the first axis).
+    window : int
+        The window size of the moving filter.
+    points : slice or index array
+        The points of `data` to calculate the filtered values for.
+    moving_filter : str, optional
+        The filter to be used for the moving filter. Can be one of 'mean' or
+        'median'.
+
+    Returns
+    -------
+    numpy.ndarray
+        The filtered values at `points` with the dtype of `data`.
+    """
+    points = np.arange(len(data))[points]
+    median = not (moving_filter == 'mean' or moving_filter == 'average')
+    # Do the windows of the points overlap?
+    dense = len(points) > 1 and np.any(np.abs(np.diff(points)) < window)
+    engine = None
+    if median and dense:
+        engine = running_median_engine()
+        if engine is None:
+            # Sliding windows of overlapping points would need too much memory
+            return movingmedian(data, window)[points]
+
+    # The window of a point i covers the samples [i - before, i + after], as
+    # for convolve1d() and median_filter(), respectively
+    if median:
+        before = window // 2
+    else:
+        before = (window - 1) // 2
+    after = window - 1 - before
+
+    # Only extend the data by reflection, if the windows exceed the data
+    if len(points) > 0 and (points.min() - before < 0
+                            or points.max() + after >= len(data)):
+        pad = ((before, after),) + ((0, 0),) * (data.ndim - 1)
+        data = np.pad(data, pad, mode='symmetric')
+    else:
+        points = points - before
+
+    if engine is not None:
+        # Slide a sorted window along all points of all traces
+        values = np.ascontiguousarray(data, dtype=np.float64)
+        values = values.reshape(len(values), -1)
+        filtered = np.empty((len(points), values.shape[1]))
+        engine(values, window, points.astype(np.intp), filtered)
+        filtered = filtered.reshape((len(points),) + data.shape[1:])
+        return filtered.astype(data.dtype, copy=False)
+
+    if not median:
+        # Sum up the windows [point, point + window), without copying the
+        # windows, in double precision
+        if len(points) > 0 and np.all(np.diff(points) >= window):
+            bounds = np.empty(2 * len(points), dtype=np.intp)
+            bounds[0::2] = points
+            bounds[1::2] = points + window
+            if bounds[-1] == len(data):
+                # The last window is summed up until the end of the data
+                bounds = bounds[:-1]
+            sums = np.add.reduceat(data, bounds, axis=0, dtype=np.float64)
+            filtered = sums[0::2] / window
+            return filtered.astype(data.dtype, copy=False)
+
+    # Windows of all points, with the window along the last axis
+    windows = sliding_window_view(data, window, axis=0)[points]
+    if not median:
+        filtered = windows.mean(axis=-1, dtype=np.float64)
+    else:
+        # Like median_filter(), take the upper median for even windows
+        rank = window // 2
+        filtered = np.partition(windows, rank, axis=-1)[..., rank]
+    return filtered.astype(data.dtype, copy=False)
+
+
+def envelope(data, block):
+    """
+    Calculate the minima, maxima, and means of consecutive blocks of the data.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        The data to be reduced (along the first axis).
+    block : int
+        The number of samples per block. The last block may be shorter.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        The minima, maxima, and means (in double precision) of the blocks.
+    """
+    bounds = np.arange(0, len(data), block)
+    if len(bounds) == 0:
+        shape = (0,) + data.shape[1:]
+        return (np.empty(shape, dtype=data.dtype),
+                np.empty(shape, dtype=data.dtype),
+                np.empty(shape, dtype=np.float64))
+    mins = np.minimum.reduceat(data, bounds, axis=0)
+    maxs = np.maximum.reduceat(data, bounds, axis=0)
+    counts = np.diff(np.append(bounds, len(data)))
+    counts = counts.reshape((-1,) + (1,) * (data.ndim - 1))
+    means = np.add.reduceat(data, bounds, axis=0, dtype=np.float64) / counts
+    return mins, maxs, means
+
+
 def moving_mean(data, window):
     """
     Calculate a filtered signal by using a moving mean.
@@ -187,7 +338,9 @@ def moving_mean(data, window):
     1D numpy.ndarray of type float
         The data filtered with a rolling mean.
     """
-    cumsum = np.cumsum(np.insert(data, 0, 0))
+    # Sum up in double precision, to avoid the accumulation of rounding errors
+    # of data with a lower precision (e.g. float32)
+    cumsum = np.cumsum(np.insert(data, 0, 0), dtype=np.float64)
     return (cumsum[window:] - cumsum[:-window]) / window
 
 
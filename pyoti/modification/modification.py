@@ -11,6 +11,7 @@ from abc import ABCMeta, abstractmethod
 
 from .. import gui
 from .. import helpers as hp
+from .. import parallel as pl
 from .. import traces as tc
 from ..evaluate import signal as sn
 from ..graph import GraphMember
@@ -354,7 +355,9 @@ class Modification(GraphMember, metaclass=ABCMeta):
         Parameters
         ----------
         data : 2D numpy.ndarray of type float
-            `data` holds the data to be modified
+            `data` holds the data to be modified. Modifications should keep
+            the dtype of `data` (see `Region.dtype`), e.g. by modifying `data`
+            in place.
         samples : index array or slice
             `samples` is the index of the samples that was used to get the
             `data`
@@ -366,37 +369,69 @@ class Modification(GraphMember, metaclass=ABCMeta):
             # Check if traces contained in data are modified by this
             # modification.
             data_traces = self.view_apply.idx_to_traces(traces_idx)
-            mod_traces = self.traces_apply
-
-            # Calculate the indices of traces contained in data and
-            # modification. First, calculate indices of modification traces.
-            mod_index = hp.overlap_index(mod_traces, data_traces)
-            if len(mod_index) > 0:
-                # At least one trace exists in both data and modification.
-                # Therefore, the data needs to be modified...
-                mod_index = hp.slicify(mod_index)
-
-                # Calculate indices of traces of the data in such a way that
-                # `data[:, data_index]` indexes the same traces as
-                # `self.traces_apply[mod_index]`
-                data_index = np.array([data_traces.index(trace)
-                                       for trace
-                                       in np.array(mod_traces)[mod_index]])
-                data_index = hp.slicify(data_index)
-
-                # Trigger a recalculation of the parameters for the
-                # modification (if necessary) before modifying the data.
-                self.evaluate()
-
-                # Modify and return the modified data
-                return self._modify(data=data,
-                                    samples=samples,
-                                    data_traces=data_traces,
-                                    data_index=data_index,
-                                    mod_index=mod_index)
+            index = self._modify_index(data_traces)
+            if index is not None:
+                data_index, mod_index = index
+                return self._modify_indexed(data, samples, data_traces,
+                                            data_index, mod_index)
         # Return unmodified data
         return data
 
+    def _modify_index(self, data_traces):
+        """
+        Calculate the indices of the traces contained in data and
+        modification.
+
+        Parameters
+        ----------
+        data_traces : list of str
+            The traces contained in the data.
+
+        Returns
+        -------
+        tuple of (slice or 1D numpy.ndarray, slice or 1D numpy.ndarray)
+            The indices (data_index, mod_index), such that
+            `data[:, data_index]` indexes the same traces as
+            `self.traces_apply[mod_index]`. None, if none of the traces of
+            the data is modified by this modification.
+        """
+        mod_traces = self.traces_apply
+
+        # First, calculate indices of modification traces.
+        mod_index = hp.overlap_index(mod_traces, data_traces)
+        if len(mod_index) == 0:
+            return None
+
+        # At least one trace exists in both data and modification.
+        # Therefore, the data needs to be modified...
+        mod_index = hp.slicify(mod_index)
+
+        # Calculate indices of traces of the data in such a way that
+        # `data[:, data_index]` indexes the same traces as
+        # `self.traces_apply[mod_index]`
+        data_index = np.array([data_traces.index(trace)
+                               for trace
+                               in np.array(mod_traces)[mod_index]])
+        data_index = hp.slicify(data_index)
+
+        return data_index, mod_index
+
+    def _modify_indexed(self, data, samples, data_traces, data_index,
+                        mod_index):
+        """
+        Modify data with already calculated indices (see `_modify_index()`).
+        """
+        # Trigger a recalculation of the parameters for the
+        # modification (if necessary) before modifying the data.
+        self.evaluate()
+
+        # Modify and return the modified data
+        return self._modify(data=data,
+                            samples=samples,
+                            data_traces=data_traces,
+                            data_index=data_index,
+                            mod_index=mod_index)
+
     @abstractmethod
     def _modify(self, data, samples, data_traces, data_index, mod_index):
         """
@@ -484,15 +519,19 @@ class Modification(GraphMember, metaclass=ABCMeta):
             decimate = 1
 
         if not based:
-            old_active = self.iattributes.active
-            self.iattributes.set_value('active', False, callback=False)
+            # Switch off self only in the current thread, to not influence
+            # data requested concurrently in other threads
+            suspended = pl.suspended()
+            old_suspended = id(self) in suspended
+            suspended.add(id(self))
 
-        data = view.get_data(traces=traces, samples=samples,
-                             moving_filter='mean', window=window,
-                             decimate=decimate, copy=copy)
-
-        if not based:
-            self.iattributes.set_value('active', old_active, callback=False)
+        try:
+            data = view.get_data(traces=traces, samples=samples,
+                                 moving_filter='mean', window=window,
+                                 decimate=decimate, copy=copy)
+        finally:
+            if not based and not old_suspended:
+                suspended.discard(id(self))
 
         return data
 
@@ -510,10 +549,9 @@ class Modification(GraphMember, metaclass=ABCMeta):
                         decimate=False, copy=True):
         """
         Get data of view apply with all modifications applied, except self.
-        This is achieved by setting the self.__active flag to False.
-        self.__active is intentionally set directly by accessing the attribute
-        and not using the property/set_active() method, to prevent firing the
-        self.set_changed() method within the set_active() method.
+        This is achieved by letting `self.active` return False in the current
+        thread, without changing the attribute 'active', to prevent firing the
+        self.set_changed() method.
         decimate is False per default. If decimate is True, it only gets used,
         if samples are set to None (step information in samples precedes over
         decimate).
@@ -620,6 +658,17 @@ class Modification(GraphMember, metaclass=ABCMeta):
 
     @property
     def active(self):
+        return self._switched_on and id(self) not in pl.suspended()
+
+    @active.setter
+    def active(self, active):
+        # Informs the View this Modification is applied to
+        self.iattributes.set_value('active', active)
+
+    @property
+    def _switched_on(self):
+        # Is the attribute 'active' set, regardless of a temporary suspension
+        # in the current thread (see `active`)?
         active = False
         if 'active' in self.iattributes:
             active = self.iattributes.active
@@ -682,3 +731,8 @@ class Modification(GraphMember, metaclass=ABCMeta):
         else:
             traces_apply = tc.normalize(traces)
         self._traces_apply = traces_apply
+        # The View this Modification is applied to needs to plan its
+        # modifications anew (see `View._modification_plan()`)
+        view = self.view_apply
+        if view is not None:
+            view._v_modplan = None  # ZODB volatile
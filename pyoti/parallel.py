@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in parallel execution of large data requests.
+
+If the number of workers is set to more than 1 (see `Experiment.workers`),
+`Region.get_data()` splits large requests into blocks of samples and requests
+the blocks concurrently in a pool of threads. The conversion of the raw data,
+the modifications and the moving filters of the blocks run in numpy, scipy
+and the compiled running median, which release the GIL. Therefore, one large
+request can use all cores of a machine.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Thread local state, see `suspended()`
+_state = threading.local()
+
+
+def suspended():
+    """
+    Returns the set of ids of the objects, which are switched off temporarily
+    in the current thread (e.g. a Modification requesting the data of its
+    View without itself, see `Modification._get_data()`). The threads of the
+    pool work with the suspended objects of the thread, which issued the
+    request.
+    """
+    ids = getattr(_state, 'suspended', None)
+    if ids is None:
+        ids = _state.suspended = set()
+    return ids
+
+
+class Pool(object):
+    """
+    Pool of threads to request blocks of data concurrently.
+    """
+    def __init__(self, workers=1, min_block=2**16):
+        """
+        Parameters
+        ----------
+        workers : int, optional
+            The number of threads. 1 (default) switches off parallel
+            execution.
+        min_block : int, optional
+            The minimum number of samples of a block. Requests with less than
+            2 * `min_block` samples are not split.
+        """
+        self._workers = max(1, int(workers or 1))
+        self.min_block = min_block
+        self._executor = None
+        self._lock = threading.Lock()
+        # Marks the threads of the pool, to not split requests within a block
+        # again, which could block all threads of the pool
+        self._local = threading.local()
+
+    @property
+    def workers(self):
+        """
+        The number of threads (1 means no parallel execution).
+        """
+        return self._workers
+
+    @workers.setter
+    def workers(self, workers):
+        with self._lock:
+            self._workers = max(1, int(workers or 1))
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    @property
+    def in_worker(self):
+        """
+        Is the current thread a thread of the pool?
+        """
+        return getattr(self._local, 'worker', False)
+
+    def blocks(self, samples, workers=None):
+        """
+        Split the slice `samples` into at most `workers` slices of at least
+        `min_block` samples, aligned to the step of `samples`.
+
+        Returns
+        -------
+        list of slice
+            A single slice, if the request should not be split.
+        """
+        workers = workers or self.workers
+        start, stop, step = samples.start, samples.stop, samples.step
+        if workers <= 1 or step < 1 or self.in_worker:
+            return [samples]
+        points = len(range(start, stop, step))
+        min_points = max(1, self.min_block // step)
+        number = min(workers, points // min_points)
+        if number <= 1:
+            return [samples]
+        size = -(-points // number) * step
+        return [slice(begin, min(begin + size, stop), step)
+                for begin in range(start, stop, size)]
+
+    def map(self, function, iterable):
+        """
+        Call `function` for all items of `iterable` in the threads of the pool
+        and return the results in the order of `iterable`.
+        """
+        caller_suspended = frozenset(suspended())
+
+        def work(item):
+            self._local.worker = True
+            _state.suspended = set(caller_suspended)
+            try:
+                return function(item)
+            finally:
+                self._local.worker = False
+                _state.suspended = set()
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._workers)
+            executor = self._executor
+        return list(executor.map(work, iterable))
+
+
+# The pool of threads of this process
+pool = Pool()
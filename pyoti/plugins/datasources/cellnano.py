@@ -12,13 +12,31 @@ from pyoti.data.datasource import DataSource
 
 
 class CNLabViewBinData(DataSource):
+    # Default for instances created before the option `mmap` was introduced
+    mmap = False
+    # Table of the chunks of the data file and (size, mtime) of the file the
+    # table was created from
+    _chunks = None
+    _chunks_stat = None
+    # Drop the last (empty) column of the data. Determined once for the table
+    # of the chunks, see `squeeze`.
+    _squeeze = None
+    # Memory mapped data file, used to read windows of the data. ZODB
+    # volatile.
+    _v_mapped = None
+
     def __init__(self, filename, directory=None, parafile=None, datext='.bin',
-                 parext='_para.dat', **kwargs):
+                 parext='_para.dat', mmap=False, **kwargs):
         """
         parext : str, optional
             The extension of the parameter file ('_para.dat', default)
+        mmap : bool, optional
+            Memory map the data file, instead of reading it. `as_array()`
+            returns a read-only `LabViewBinArray`, which reads only the
+            samples that are actually requested from the file.
         """
         super().__init__(filename=filename, directory=directory, **kwargs)
+        self.mmap = mmap
 
         if parafile is None:
             parafile = self.absfile.replace(datext, parext)
@@ -33,23 +51,146 @@ class CNLabViewBinData(DataSource):
 
     def as_array(self):
         filename = self.absfile
-        data = lv.read_labview_bin_data(filename)
+        chunks = self.chunks
+        if self.mmap:
+            data = lv.memmap_labview_bin_data(filename, chunks=chunks,
+                                              squeeze=self.squeeze)
+        else:
+            data = lv.read_labview_bin_data(filename, chunks=chunks)
         return data
 
+    def read(self, start=None, stop=None, traces=None):
+        """
+        Read a window of the data from the memory mapped data file. Only the
+        pages of the file containing the requested samples are read.
+        """
+        chunks = self.chunks
+        if self._v_mapped is None or self._v_mapped._chunks is not chunks:
+            self._v_mapped = self._map(chunks)
+        if traces is None:
+            traces = slice(None)
+        return self._v_mapped[start:stop, traces]
+
+    def _map(self, chunks):
+        return lv.LabViewBinArray(self.absfile, chunks, squeeze=self.squeeze)
+
+    @property
+    def chunks(self):
+        """
+        The table of the chunks of the data file (see
+        `pyoti.data.labview.chunk_table()`). The table is stored together with
+        the size and the modification time of the data file and only rebuilt,
+        if the data file has changed.
+        """
+        filename = self.absfile
+        stat = self.stat()
+        if self._chunks is None or self._chunks_stat != stat:
+            print('Getting chunk info from:')
+            print('  \'%s\'' % filename)
+            self._chunks = lv.chunk_table(filename)
+            self._chunks_stat = stat
+            self._squeeze = None
+        return self._chunks
+
+    @property
+    def squeeze(self):
+        """
+        Is the last column of the data file empty (i.e. contains only zeros)
+        and dropped from the data? Only checked once for the table of the
+        chunks, because the check reads the last column of the whole file.
+        """
+        chunks = self.chunks
+        if self._squeeze is None:
+            self._squeeze = lv.zero_last_column(self.absfile, chunks)
+        return self._squeeze
+
     @property
     def parafile_orig(self):
         return self._parafile_orig
 
 
+class CNLabViewBinStreamData(CNLabViewBinData):
+    """
+    LabVIEW binary data file, which is still growing (e.g. during the
+    acquisition of the data).
+
+    The data is a snapshot of the data file, which is memory mapped. The
+    snapshot is extended only by the chunks appended to the data file, when
+    `refresh()` is called (see `Record.update_data()`). Whether the last
+    (empty) column is dropped is determined only once, to keep the number of
+    columns of the growing data constant.
+    """
+
+    def __init__(self, filename, directory=None, parafile=None, datext='.bin',
+                 parext='_para.dat', **kwargs):
+        kwargs.pop('mmap', None)
+        super().__init__(filename, directory=directory, parafile=parafile,
+                         datext=datext, parext=parext, mmap=True, **kwargs)
+
+        self.name = ("LabVIEW bin stream data originally loaded from \n"
+                     "    %s with \n"
+                     "    samplingrate %s Hz") % (self.absfile_orig,
+                                                  self.samplingrate)
+
+    def as_array(self):
+        return self._map(self.chunks)
+
+    @property
+    def chunks(self):
+        """
+        The table of the chunks of the snapshot of the data file (see
+        `pyoti.data.labview.chunk_table()`). Other than for
+        `CNLabViewBinData`, the table is not rebuilt, if the data file has
+        changed. Use `refresh()` to index appended chunks.
+        """
+        if self._chunks is None:
+            return super().chunks
+        return self._chunks
+
+    def refresh(self):
+        """
+        Index the chunks, which were appended to the data file since the last
+        refresh. Only the headers of the new chunks are read.
+
+        Returns
+        -------
+        int
+            The number of samples added to the data.
+        """
+        chunks = self.chunks
+        stat = self.stat()
+        if stat == self._chunks_stat:
+            return 0
+        pos = 0
+        if len(chunks) > 0:
+            # position of the header following the last chunk
+            pos = int(chunks[-1, 0] + chunks[-1, 1] * chunks[-1, 2])
+        appended = lv.chunk_table(self.absfile, pos=pos)
+        self._chunks_stat = stat
+        if len(appended) == 0:
+            return 0
+        self._chunks = np.concatenate((chunks, appended))
+        return int(appended[:, 1].sum())
+
+
 class CNLabViewTxtData(DataSource):
+    # Default for instances created before the option `shadow` was introduced
+    shadow = True
+
     def __init__(self, filename, directory=None, samplingrate=1000.0,
-                 **kwargs):
+                 shadow=True, **kwargs):
         """
         parext : str, optional
             The extension of the parameter file ('_para.dat', default)
+        shadow : bool, optional
+            Save the parsed data to a binary shadow file next to the data file
+            (data file name + '.npy'). As long as the shadow file is newer
+            than the data file, the shadow file is memory mapped instead of
+            parsing the data file, again.
         """
         super().__init__(filename=filename, directory=directory, **kwargs)
         self.samplingrate = samplingrate
+        self.shadow = shadow
 
         self.name = ("LabVIEW txt data originally loaded from \n"
                      "    %s with \n"
@@ -58,15 +199,48 @@ class CNLabViewTxtData(DataSource):
 
     def as_array(self):
         filename = self.absfile
-        data = np.loadtxt(filename, skiprows=5)
+        data = None
+        if self.shadow:
+            data = lv.load_shadow(filename)
+        if data is None:
+            print('Parsing data from:')
+            print('  \'%s\'' % filename)
+            data = lv.read_labview_txt_data(filename, skiprows=5)
+            if self.shadow and not lv.save_shadow(filename, data):
+                print("Could not save the binary shadow file of:")
+                print('  \'%s\'' % filename)
         return data
 
+    def read(self, start=None, stop=None, traces=None):
+        """
+        Read the requested window of the data from the binary shadow file or,
+        if there is no valid shadow file, parse only the lines of the
+        requested window of the data.
+        """
+        if traces is None:
+            traces = slice(None)
+        data = None
+        if self.shadow:
+            data = lv.load_shadow(self.absfile)
+        if data is not None:
+            return np.asarray(data[start:stop, traces])
+        start = start or 0
+        max_rows = None
+        if stop is not None:
+            max_rows = max(0, stop - start)
+        data = np.loadtxt(self.absfile, skiprows=5 + start, max_rows=max_rows,
+                          ndmin=2)
+        return data[:, traces]
+
 
 class CNLabViewQPDviData(CNLabViewTxtData):
     def __init__(self, filename, directory=None, **kwargs):
         super().__init__(filename, directory=directory, **kwargs)
-        self.samplingrate = np.genfromtxt(self.absfile, skip_header=2,
-                                          max_rows=1)[0]
+        # The samplingrate is the first value of the third line
+        with open(self.absfile, 'r') as f:
+            for i in range(3):
+                line = f.readline()
+        self.samplingrate = float(line.split()[0])
 
         self.name = ("LabVIEW QPD.vi data originally loaded from \n"
                      "    %s with \n"
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+DataSource for chunked, compressed container files (see
+`pyoti.data.chunked`) and conversion of other datasources into such files.
+"""
+import os
+
+from pyoti.data import chunked as ck
+from pyoti.data.datasource import DataSource
+
+
+class ChunkedData(DataSource):
+    # Opened container file. ZODB volatile.
+    _v_array = None
+    _v_array_stat = None
+
+    def __init__(self, filename, directory=None, samplingrate=None, **kwargs):
+        """
+        filename : str
+            The container file, e.g. created by `convert_datasource()`.
+        directory : str
+        samplingrate : float, optional
+            Defaults to the samplingrate stored in the container file or 1000
+            Hz.
+        """
+        super().__init__(filename=filename, directory=directory, **kwargs)
+
+        if samplingrate is None:
+            samplingrate = self._array().attrs.get('samplingrate',
+                                                   self.samplingrate)
+        self.samplingrate = samplingrate
+
+        self.name = ("Chunked data originally loaded from \n"
+                     "    %s with \n"
+                     "    samplingrate %s Hz") % (self.absfile_orig,
+                                                  self.samplingrate)
+
+    def _array(self):
+        """
+        Open the container file. The opened file is reused as long as it has
+        not changed.
+        """
+        stat = self.stat()
+        if self._v_array is None or self._v_array_stat != stat:
+            self._v_array = ck.ChunkedArray(self.absfile)
+            self._v_array_stat = stat
+        return self._v_array
+
+    def as_array(self):
+        """
+        Return a read-only `ChunkedArray`, which decompresses only the chunks
+        of the samples that are actually requested.
+        """
+        return self._array()
+
+    def read(self, start=None, stop=None, traces=None):
+        """
+        Decompress only the chunks holding the requested window of the data.
+        """
+        if traces is None:
+            traces = slice(None)
+        return self._array()[start:stop, traces]
+
+
+def convert_datasource(datasource, filename, directory=None,
+                       chunk_size=2**16, compresslevel=6, shuffle=True):
+    """
+    Convert the data of a DataSource into a chunked container file, which can
+    be loaded with the DataSource `ChunkedData`.
+
+    If the DataSource supports reading windows of the data (see
+    `DataSource.read()`), the data is converted chunk by chunk, without
+    loading all data into memory.
+
+    Parameters
+    ----------
+    datasource : DataSource
+        The DataSource to be converted, e.g. `record.datasource`.
+    filename : str
+        The name of the container file to be created.
+    directory : str, optional
+        The directory of the container file. Defaults to the current working
+        directory.
+    chunk_size : int, optional
+        The number of samples per chunk.
+    compresslevel : int, optional
+        The zlib compression level (0 to 9).
+    shuffle : bool, optional
+        Shuffle the bytes of the values before compression.
+
+    Returns
+    -------
+    str
+        The absolute path of the container file.
+    """
+    if directory is not None:
+        filename = os.path.join(directory, filename)
+    filename = os.path.abspath(filename)
+
+    if type(datasource).read is not DataSource.read:
+        def blocks():
+            start = 0
+            while True:
+                block = datasource.read(start, start + chunk_size)
+                if len(block) > 0:
+                    yield block
+                if len(block) < chunk_size:
+                    break
+                start += chunk_size
+        data = blocks()
+    else:
+        data = datasource.as_array()
+
+    print("Converting data to:")
+    print("  '%s'" % filename)
+    attrs = {'samplingrate': float(datasource.samplingrate),
+             'source': datasource.name}
+    ck.write_chunked_data(filename, data, chunk_size=chunk_size,
+                          compresslevel=compresslevel, shuffle=shuffle,
+                          attrs=attrs)
+    return filename
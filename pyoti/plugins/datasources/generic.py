@@ -16,6 +16,8 @@ class GenericDataFile(DataSource):
                  **kwargs):
         """
         load_data : function
+            If `load_data` accepts the parameters `start` and `stop`, it is
+            used to read windows of the data, too (see method `read()`).
         filename : str
         directory : str
         samplingrate : float
@@ -52,6 +54,18 @@ class GenericDataFile(DataSource):
         data = self.load_data(filename, **self.load_data_args)
         return data
 
+    def read(self, start=None, stop=None, traces=None):
+        parameters = inspect.getargspec(self.load_data.ft)[0]
+        if 'start' not in parameters or 'stop' not in parameters:
+            return super().read(start=start, stop=stop, traces=traces)
+        if traces is None:
+            traces = slice(None)
+        filename = self.absfile
+        load_data_args = self.load_data_args.copy()
+        load_data_args.update(start=start, stop=stop)
+        data = self.load_data(filename, **load_data_args)
+        return data[:, traces]
+
 
 class GenericData(DataSource):
     def __init__(self, load_data, samplingrate=1.0, **kwargs):
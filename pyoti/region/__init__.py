@@ -1,4 +1,5 @@
 from .region import Region
 from .record import Record
 from .view import View
-from .view import MultiRegion
\ No newline at end of file
+from .view import MultiRegion
+from .selection import Selection
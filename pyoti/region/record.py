@@ -4,15 +4,173 @@ Created on Wed Mar  9 17:09:09 2016
 
 @author: Tobias Jachowski
 """
+import glob
 import hashlib
 import inspect
 import numpy as np
+import os
+import time
 
 from .. import config as cf
+from .. import helpers as hp
 from .. import traces as tc
+from ..cache import manager as cache_manager
 from .region import Region
 
 
+def _md5_digest(data, block_size=2**23):
+    """
+    MD5 hashdigest of all `data`, hashed block by block. The C-ordered blocks
+    result in the same hashdigest as hashing a C-ordered copy of the whole
+    array at once.
+    """
+    md5 = hashlib.md5()
+    block = max(1, block_size // max(1, data.shape[1]))
+    for i in range(0, data.shape[0], block):
+        md5.update(np.ascontiguousarray(data[i:i + block]))
+    return md5.hexdigest()
+
+
+def _sample_digest(data, blocks=16, block_size=1024, samples=None):
+    """
+    MD5 hashdigest of the shape of `data` and of `blocks` blocks of
+    `block_size` samples, evenly spread over all samples of `data`. If
+    `samples` is given, only the first `samples` samples of `data` are
+    considered.
+    """
+    if samples is None:
+        samples = data.shape[0]
+    md5 = hashlib.md5(str((samples,) + tuple(data.shape[1:])).encode())
+    starts = np.unique(np.linspace(0, max(0, samples - block_size), blocks,
+                                   dtype=int))
+    for start in starts:
+        stop = min(start + block_size, samples)
+        md5.update(np.ascontiguousarray(data[start:stop]))
+    return md5.hexdigest()
+
+
+def _data_identity(data, stat, full=False):
+    """
+    Identity of the data of a new Record: the MD5 hashdigest of all `data`
+    (only if `full`, otherwise None) and the shape, the size and modification
+    time `stat` of the data file, and a digest of samples of `data` (see
+    `Record.integrity`).
+    """
+    dataident = _md5_digest(data) if full else None
+    return dataident, (tuple(data.shape), stat, _sample_digest(data))
+
+
+def _trace_index(traces, trace):
+    """
+    Index of the trace(s) `trace` within the names `traces`, like
+    `Region.traces_to_idx()`.
+    """
+    num_traces = len(traces)
+    traces_idx = []
+    for name in tc.normalize(trace):
+        if name in traces:
+            traces_idx.append(traces.index(name))
+        elif isinstance(name, int) and name < num_traces:
+            traces_idx.append(name)
+    return hp.slicify(traces_idx, length=num_traces)
+
+
+def _factors(raw_data, traces, offset=None, conversion=None, inversion=None):
+    """
+    Resolve the offset, conversion, and inversion of a new Record, given as
+    dicts of trace: value pairs (see `Record`), into arrays with one value for
+    every trace of `traces`.
+    """
+    num_traces = len(traces)
+    _offset = np.zeros(num_traces)
+    _conversion = np.ones(num_traces)
+    _inversion = np.ones(num_traces)
+
+    try:
+        for trace, value in offset.items():
+            trace_idx = _trace_index(traces, trace)
+            if isinstance(value, str):
+                value = getattr(np, value)(raw_data[:, trace_idx], axis=0)
+            _offset[trace_idx] = value
+    except:
+        pass
+
+    try:
+        for trace, value in conversion.items():
+            _conversion[_trace_index(traces, trace)] = value
+    except:
+        pass
+
+    try:
+        for trace, value in inversion.items():
+            _inversion[_trace_index(traces, trace)] = - int(value) or 1
+    except:
+        pass
+
+    return _offset, _conversion, _inversion
+
+
+def _convert_data(raw_data, dtype, offset, inversion, conversion):
+    """
+    Apply `offset`, `inversion`, and `conversion` to a copy of `raw_data` of
+    the type `dtype`.
+    """
+    data = np.array(raw_data, dtype=dtype)
+    data -= offset.astype(dtype)
+    data *= (inversion * conversion).astype(dtype)
+    return data
+
+
+def _cachefile_name(cachedir, rc_class, group, name, dtype, dataident_fast,
+                    factors):
+    """
+    The name of the file the converted data of a Record is cached in, unique
+    for the data identity and the offset, inversion, and conversion `factors`
+    of the Record (see `Record._cachefile`).
+    """
+    prefix = hashlib.md5(repr((group, name)).encode())
+    key = hashlib.md5(repr((rc_class.__qualname__, np.dtype(dtype).str,
+                            dataident_fast)).encode())
+    for value in factors:
+        key.update(np.ascontiguousarray(value, dtype=float))
+    return os.path.join(cachedir, '%s_%s.npy' % (prefix.hexdigest()[:16],
+                                                 key.hexdigest()))
+
+
+def _write_cachefile(filename, data):
+    """
+    Save `data` to the cache file `filename` and delete outdated cache files
+    of the same Record.
+
+    Raises
+    ------
+    OSError
+        If the cache file could not be written.
+    """
+    cachedir = os.path.dirname(filename)
+    prefix = os.path.basename(filename).split('_')[0]
+    os.makedirs(cachedir, exist_ok=True)
+    for outdated in glob.glob(os.path.join(cachedir, prefix + '_*.npy')):
+        os.remove(outdated)
+    # Write to a temporary file first, to never leave a partially written
+    # cache file behind
+    tmpfile = '%s.%d.tmp' % (filename, os.getpid())
+    with open(tmpfile, 'wb') as f:
+        np.save(f, data)
+    os.replace(tmpfile, filename)
+
+
+def _float_dtype(dtype):
+    """
+    Return the name of the floating point type `dtype`.
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind != 'f':
+        raise ValueError("The dtype of a Record has to be a floating point "
+                         "type, e.g. 'float32' or 'float64'.")
+    return dtype.name
+
+
 class Record(Region):
     """
     A Record consists of:
@@ -43,8 +201,25 @@ class Record(Region):
     a common convention for the directions (left/right, down/up is neg/pos) is
     followed.
     """
+    # Memory mapped raw data of the datasource. ZODB volatile.
+    _v_raw_data = None
+    # Identity of the data: MD5 hashdigest of all data (`_dataident`) and
+    # shape, size and modification time of the data file, and a digest of
+    # samples of the data (`_dataident_fast`).
+    _dataident = None
+    _dataident_fast = None
+    # Mode of the data identity check, whenever the data is loaded: 'fast'
+    # (compare file size and modification time, and, if they differ, a digest
+    # of samples of the data) or 'full' (MD5 hashdigest of all data).
+    integrity = 'fast'
+    # Type of the converted data
+    _dtype = 'float64'
+    # Records always cache all data at once
+    tile_size = None
+
     def __init__(self, datasource, traces, calibration, offset=None,
-                 conversion=None, inversion=None, **kwargs):
+                 conversion=None, inversion=None, integrity=None, dtype=None,
+                 **kwargs):
         """
         Parameters
         ----------
@@ -53,7 +228,13 @@ class Record(Region):
             function as_array() and the attribue `name`.
         offset: dictionary of trace: value pairs
             value can either be a value or a numpy function (e.g. median)
-
+        integrity : str, optional
+            Mode of the identity check of the data, whenever the data is
+            loaded. Either 'fast' (default) or 'full' (see `verify_data()`).
+        dtype : str or numpy.dtype, optional
+            The floating point type the converted data is stored, cached, and
+            modified in. Defaults to 'float64'. Use 'float32' to halve the
+            memory needed by long recordings.
         """
         super().__init__(max_parents=1, caching=True, **kwargs)
 
@@ -61,7 +242,13 @@ class Record(Region):
             raise TypeError("Record missing the required positional argument "
                             "'datasource'.")
         self._datasource = datasource
-        self._dataident = None
+        if integrity is not None:
+            if integrity not in ('fast', 'full'):
+                raise ValueError("Record argument 'integrity' has to be "
+                                 "either 'fast' or 'full'.")
+            self.integrity = integrity
+        if dtype is not None:
+            self._dtype = _float_dtype(dtype)
 
         # Instance of Calibration used to get dsurf, radius and focalshift
         if calibration is None:
@@ -69,11 +256,23 @@ class Record(Region):
                             "'calibraion'.")
         self.calibration = calibration
 
+        # Data read, verified, and converted in advance (see
+        # `prepare_record()`)
+        prepared = datasource._v_prepared
+        datasource._v_prepared = None
+        if prepared is not None:
+            raw_data = datasource._v_preloaded
+            datasource._v_preloaded = None
+            self._dataident, self._dataident_fast = prepared[:2]
+            if not isinstance(raw_data, np.ndarray):
+                self._v_raw_data = raw_data
+        else:
+            raw_data = self._raw_data
+
         # Initialize self._shape before trying to set offset, inversion, or
         # conversion, which in turn need to (indirectly) access self._shape.
         # ZODB volatile.
-        self._v_data_cached = self._raw_data
-        raw_data = self._v_data_cached
+        self._v_data_cached = raw_data
         self._shape = raw_data.shape
 
         # Check if there are as many descriptions as traces in the data
@@ -88,79 +287,338 @@ class Record(Region):
         self._traces = traces
 
         # Initialize values of offset (0), inversion (1), and conversion (1)
-        # for all available traces
-        self._offset = np.zeros(self.num_traces)
-        self._conversion = np.ones(self.num_traces)
-        self._inversion = np.ones(self.num_traces)
-
-        # Modify offset, conversion and inversion according to optional
+        # for all available traces and modify them according to optional
         # parameters
-        try:
-            for trace, value in offset.items():
-                if isinstance(value, str):
-                    trace_idx = self.traces_to_idx(trace)
-                    value = getattr(np, value)(raw_data[:, trace_idx], axis=0)
+        if prepared is not None:
+            factors = prepared[2]
+        else:
+            factors = _factors(raw_data, traces, offset=offset,
+                               conversion=conversion, inversion=inversion)
+        self._offset, self._conversion, self._inversion = factors
 
-                self.set_offset(trace, value)
-        except:
-            pass
+        # reset cache according to modified offset, inversion, and conversion.
+        # ZODB volatile.
+        start = time.perf_counter()
+        if prepared is not None:
+            self._v_data_cached = prepared[3]
+        else:
+            self._v_data_cached = self._convert(raw_data)
+        cache_manager.add(self, time.perf_counter() - start)
+        self._save_cachefile()
+
+    def update_cache(self, force=False):
+        """
+        Create and update cached data.
 
-        try:
-            for trace, value in conversion.items():
-                self.set_conversion(trace, value)
-        except:
-            pass
+        If the Record belongs to an Experiment, the converted data is
+        additionally cached on disk in the cache directory of the Experiment
+        and kept as a read-only memory mapped array instead of in memory (see
+        `_save_cachefile()`).
 
+        Parameters
+        ----------
+        force : bool
+            Recalculate, even if self._v_data_cached is up to date.
+        """
+        if not self.caching:
+            return
+        if self._v_data_cached is not None and not force:
+            cache_manager.touch(self)
+            return
+        if not force:
+            start = time.perf_counter()
+            data = self._load_cachefile()
+            if data is not None:
+                self._v_data_cached = data
+                cache_manager.add(self, time.perf_counter() - start)
+                return
+        super().update_cache(force=force)
+        self._save_cachefile()
+
+    @property
+    def _cachefile(self):
+        """
+        The file the converted data is cached in on disk. The name of the file
+        is unique for the data identity and the offset, inversion, and
+        conversion of the Record. None, if the data can not be cached on disk.
+        """
+        root = getattr(self.datasource, '_root', None)
+        cachedir = getattr(root, '_v_cachedir', None)
+        if cachedir is None or self._dataident_fast is None:
+            return None
+        # The data file needs to be unchanged since the last identity check
+        stat = self.datasource.stat()
+        if stat is None or stat != self._dataident_fast[1]:
+            return None
+        return _cachefile_name(cachedir, type(self), self.group, self.name,
+                               self.dtype, self._dataident_fast,
+                               (self.offset, self.inversion, self.conversion))
+
+    def _load_cachefile(self):
+        """
+        Load the converted data from the cache file on disk as a read-only
+        memory mapped array. Return None, if there is no valid cache file.
+        """
+        filename = self._cachefile
+        if filename is None or not os.path.isfile(filename):
+            return None
         try:
-            for trace, value in inversion.items():
-                self.set_inversion(trace, value)
-        except:
-            pass
+            data = np.load(filename, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        if data.shape != tuple(self._shape):
+            return None
+        return data
 
-        # reset cache according to modified offset, inversion, and conversion.
-        # ZODB volatile.
-        self._v_data_cached = ((raw_data - self.offset) * self.inversion
-                               * self.conversion)
+    def _save_cachefile(self):
+        """
+        Save the converted data to the cache file on disk and delete outdated
+        cache files of this Record.
+
+        Afterwards, the cached data in memory is replaced by the read-only
+        memory mapped cache file, i.e. the converted data is read from disk on
+        demand and does not count against the budget of the cache manager.
+        """
+        filename = self._cachefile
+        if filename is None or self._v_data_cached is None:
+            return
+        if not os.path.isfile(filename):
+            try:
+                _write_cachefile(filename, self._v_data_cached)
+            except OSError as err:
+                print("Could not cache the data of record '%s' on disk:\n  %s"
+                      % (self.name, err))
+                return
+        data = self._load_cachefile()
+        if data is not None:
+            self._v_data_cached = data
+            cache_manager.resize(self, 0)
 
     def _get_data_uncached(self, samples, traces_idx, copy=True):
         """
         Returns the data of Record, according to self.filename.
         Copy is always True for Record, because every time it reads in the data
         it createas a new numpy.ndarray.
+
+        If only a part of the data is requested, only the window of the
+        requested samples is read from the datasource (see
+        `DataSource.read()`). Only if all data is read, it is compared to the
+        hashdigest of the data.
         """
         # read in data
-        data = ((self._raw_data[samples, traces_idx] - self.offset[traces_idx])
-                * self.inversion[traces_idx]
-                * self.conversion[traces_idx])
+        if self._read_window(samples, traces_idx):
+            raw_data = self._read_raw_data(samples, traces_idx)
+        else:
+            raw_data = self._raw_data[samples, traces_idx]
+        data = self._convert(raw_data, traces_idx)
         # TODO: Implement different samplingrates for different traces. Pandas?
         return data
 
+    def _convert(self, raw_data, traces_idx=slice(None)):
+        """
+        Apply offset, inversion, and conversion to a copy of `raw_data` of the
+        type `self.dtype`.
+        """
+        return _convert_data(raw_data, self.dtype, self.offset[traces_idx],
+                             self.inversion[traces_idx],
+                             self.conversion[traces_idx])
+
+    def _read_window(self, samples, traces_idx):
+        """
+        Decide, whether only a window of the data should be read from the
+        datasource, instead of all data.
+        """
+        # Subclasses that modify the data in `_raw_data` (see SpecialRecord)
+        # need all data to be read.
+        if type(self)._raw_data is not Record._raw_data:
+            return False
+        # A memory mapped array is already available
+        if self._v_raw_data is not None:
+            return False
+        if isinstance(samples, slice) and isinstance(traces_idx, slice):
+            # All data is requested
+            if (samples.indices(self.datapoints) == (0, self.datapoints, 1)
+                    and traces_idx.indices(self.num_traces)
+                    == (0, self.num_traces, 1)):
+                return False
+        return True
+
+    def _read_raw_data(self, samples, traces_idx):
+        """
+        Read the window of the uncorrected data (no offset, no inversion, no
+        conversion) spanning the requested samples from the datasource.
+        """
+        if isinstance(samples, slice):
+            samples = range(*samples.indices(self.datapoints))
+            if len(samples) == 0:
+                return self.datasource.read(0, 0, traces_idx)
+            start = min(samples[0], samples[-1])
+            stop = max(samples[0], samples[-1]) + 1
+            data = self.datasource.read(start, stop, traces_idx)
+            return data[samples[0] - start::samples.step]
+        # samples is an np.array
+        if len(samples) == 0:
+            return self.datasource.read(0, 0, traces_idx)
+        start = samples.min()
+        stop = samples.max() + 1
+        data = self.datasource.read(start, stop, traces_idx)
+        return data[samples - start]
+
     @property
     def _raw_data(self):
         """
         Reads and returns uncorrected, uncached data (no offset, no inversion,
         no conversion).
-        Additionally, sets self._shape according to _raw_data.shape and creates
-        or compares previously generated hashdigest of the data.
+        Additionally, checks the identity of the data (see `verify_data()`).
+
+        If the datasource returns a memory mapped array-like object (e.g. a
+        `LabViewBinArray`) instead of a numpy.ndarray, the data is not copied
+        into memory as a whole. The mapped object is verified only once and
+        then kept as long as the Record is in memory.
+
+        The returned data may be owned by the datasource or be read-only.
+        Copy the data before modifying it in place.
         """
-        data = self.datasource.as_array()
-        if not isinstance(data, np.ndarray):
+        # Reuse a previously verified memory mapped array. ZODB volatile.
+        if self._v_raw_data is not None:
+            return self._v_raw_data
+        # Use the data read in advance (see `Experiment.create_records()`)
+        data = self.datasource._v_preloaded
+        if data is None:
+            data = self.datasource.as_array()
+        else:
+            self.datasource._v_preloaded = None
+        if not (isinstance(data, np.ndarray) or hasattr(data, '__array__')):
             raise TypeError("The data you try to load is no numpy array!")
         if data.ndim != 2:
             raise ValueError("The data array you try to load does not have 2 "
                              "dimensions!")
-        data = data.copy(order='C')
-        ident = hashlib.md5(data).hexdigest()
-        if self._dataident is None:
-            self._dataident = ident
-        elif self._dataident != ident:
-            raise ValueError("The data you try to load from '%s' has changed "
-                             "since the last time. Please, check the "
-                             "datasource of the record '%s'."
-                             % (self.datasource.name, self.name))
+
+        self._verify_data(data)
+
+        if not isinstance(data, np.ndarray):
+            self._v_raw_data = data
 
         return data
 
+    def verify_data(self, full=True):
+        """
+        Check, whether the data of the datasource has changed since the Record
+        was created.
+
+        Parameters
+        ----------
+        full : bool, optional
+            Hash all data with MD5 (True) or only compare the size and the
+            modification time of the data file and a digest of samples of the
+            data (False).
+
+        Raises
+        ------
+        ValueError
+            If the data has changed.
+        """
+        data = self.datasource.as_array()
+        self._verify_data(data, full=full)
+
+    def _verify_data(self, data, full=None):
+        """
+        Check the identity of `data`. See `integrity` for the different modes.
+        The first check of a Record stores the identity of the data.
+        """
+        if full is None:
+            full = self.integrity == 'full'
+        shape = tuple(data.shape)
+        stat = self.datasource.stat()
+
+        if full or (self._dataident_fast is None
+                    and self._dataident is not None):
+            # Full check on request or establish the fast identity of a Record
+            # that was created with an older version, once.
+            ident = _md5_digest(data)
+            if self._dataident is None:
+                self._dataident = ident
+            elif self._dataident != ident:
+                self._data_changed()
+            self._dataident_fast = (shape, stat, _sample_digest(data))
+            return
+
+        if self._dataident_fast is None:
+            self._dataident_fast = (shape, stat, _sample_digest(data))
+            return
+
+        _shape, _stat, _digest = self._dataident_fast
+        if shape != _shape:
+            self._data_changed()
+        if stat is not None and stat == _stat:
+            # Unchanged data file
+            return
+        if _sample_digest(data) != _digest:
+            self._data_changed()
+        # Data file has been copied or touched, only
+        self._dataident_fast = (shape, stat, _digest)
+
+    def update_data(self):
+        """
+        Append the samples, which were added to a growing datasource (e.g. a
+        `CNLabViewBinStreamData` during the acquisition), to the data of this
+        Record.
+
+        Only the new samples are read and converted. The descendants are
+        informed about the added samples, i.e. Views with a sticky stop follow
+        the new end of the data.
+
+        Returns
+        -------
+        int
+            The number of added samples.
+        """
+        refresh = getattr(self.datasource, 'refresh', None)
+        if refresh is None:
+            print("The datasource of the record '%s' can not grow."
+                  % self.name)
+            return 0
+        refresh()
+
+        data = self.datasource.as_array()
+        samples, num_traces = self._shape
+        if data.ndim != 2 or data.shape[1] != num_traces:
+            self._data_changed()
+        added = data.shape[0] - samples
+        if added <= 0:
+            return 0
+
+        # Verify the data that was already known
+        if self._dataident_fast is not None:
+            digest = _sample_digest(data, samples=samples)
+            if digest != self._dataident_fast[2]:
+                self._data_changed()
+
+        tail = self._convert(data[samples:])
+        if self._v_data_cached is not None:
+            self._v_data_cached = np.concatenate((self._v_data_cached, tail))
+            cache_manager.add(self)
+        if not isinstance(data, np.ndarray):
+            self._v_raw_data = data
+
+        self._shape = data.shape
+        # The hashdigest of all data is not valid anymore
+        self._dataident = None
+        self._dataident_fast = (tuple(data.shape), self.datasource.stat(),
+                                _sample_digest(data))
+
+        # Inform descendants about the samples added at the end of the data
+        index_shift = (self, 'stop', samples, added)
+        self.set_changed(level=1, index_shift=index_shift, leave_cache=True)
+
+        return added
+
+    def _data_changed(self):
+        raise ValueError("The data you try to load from '%s' has changed "
+                         "since the last time. Please, check the "
+                         "datasource of the record '%s'."
+                         % (self.datasource.name, self.name))
+
     @property
     def offset(self):
         return self._offset.copy()
@@ -226,6 +684,18 @@ class Record(Region):
     def num_traces(self):
         return self._shape[1]
 
+    @property
+    def dtype(self):
+        return np.dtype(self._dtype)
+
+    @dtype.setter
+    def dtype(self, dtype):
+        dtype = _float_dtype(dtype)
+        if dtype != self._dtype:
+            self._dtype = dtype
+            # Inform descendants of change
+            self.set_changed()
+
     @property
     def traces(self):
         return self._traces.copy()
@@ -298,6 +768,37 @@ def create_record(calibration,
         Is used to get parameters for initialization of `rc_class` and
         initialisation of `ds_class`
     """
+    arguments = record_arguments(traces=traces, name=name, rc_class=rc_class,
+                                 ds_class=ds_class, offset=offset,
+                                 conversion=conversion, inversion=inversion,
+                                 cfgfile=cfgfile, **kwargs)
+    if arguments is None:
+        return None
+    rc_class, datasource, traces, record_pars = arguments
+    return rc_class(datasource, traces, calibration, name=name, group=group,
+                    **record_pars)
+
+
+def record_arguments(traces=None,
+                     name=None,
+                     rc_class=None,
+                     ds_class=None,
+                     offset=None,
+                     conversion=None,
+                     inversion=None,
+                     cfgfile=None,
+                     **kwargs):
+    """
+    Read the configfile and create the datasource of a new Record, without
+    creating the Record itself (see `create_record()`).
+
+    Returns
+    -------
+    tuple of (class, DataSource, list of str, dict) or None
+        The class of the Record, the datasource, the traces, and the keyword
+        arguments to create the Record with. None, if the classes defined in
+        the configfile could not be created.
+    """
 
     # Set default configfile
     cfgfile = cfgfile or 'record.cfg'
@@ -319,10 +820,16 @@ def create_record(calibration,
 
     # get parameters specific for record
     record_pars = {}
-    for par in inspect.getargspec(rc_class.__init__)[0]:
+    rc_args = inspect.getargspec(rc_class.__init__)[0]
+    for par in rc_args:
         if par in kwargs:
             record_pars[par] = kwargs.pop(par)
 
+    # get the dtype of the record from the config file, if not given
+    dtype = cf.get_cfg_option(cfg, sec='record', opt='dtype')
+    if 'dtype' in rc_args and 'dtype' not in record_pars and dtype:
+        record_pars['dtype'] = dtype
+
     # datasource class and parameters
     ds_class = ds_class or cf.get_cfg_class(cfg, sec='datasource',
                                         std_mod='.plugins.datasources.generic',
@@ -344,8 +851,70 @@ def create_record(calibration,
     inversion = inversion or cf.get_cfg_sec_dict(cfg, 'inversion',
                                                  convert='boolean')
 
-    record = rc_class(datasource, traces, calibration, offset=offset,
-                      conversion=conversion, inversion=inversion, name=name,
-                      group=group, **record_pars)
+    record_pars.update(offset=offset, conversion=conversion,
+                       inversion=inversion)
+
+    return rc_class, datasource, traces, record_pars
+
+
+def prepare_record(arguments, name=None, group=None):
+    """
+    Read, verify, and convert the data of a new Record in advance, without
+    creating the Record (see `record_arguments()`). Only numpy and the file
+    system are used, i.e. the data of several Records can be prepared in
+    parallel threads (see `Experiment.create_records()`).
+
+    The prepared data is stored in the datasource and used once by the Record
+    created with `arguments`. If the datasource belongs to an Experiment with
+    a cache directory, the converted data is cached on disk and memory
+    mapped.
+
+    Parameters
+    ----------
+    arguments : tuple
+        The class of the Record, the datasource, the traces, and the keyword
+        arguments, as returned by `record_arguments()`.
+    name : str
+    group : str
+    """
+    rc_class, datasource, traces, record_pars = arguments
+    raw_data = datasource.as_array()
+    datasource._v_preloaded = raw_data
+
+    # Subclasses that modify the raw data or its conversion need the Record
+    # itself to prepare the data
+    if rc_class._raw_data is not Record._raw_data \
+            or rc_class._convert is not Record._convert:
+        return
+    traces = tc.normalize(traces)
+    if not hasattr(raw_data, '__array__') or raw_data.ndim != 2 \
+            or raw_data.shape[1] != len(traces):
+        # Let the Record raise the error
+        return
+
+    dtype = _float_dtype(record_pars.get('dtype') or rc_class._dtype)
+    integrity = record_pars.get('integrity') or rc_class.integrity
+    stat = datasource.stat()
+    dataident, dataident_fast = _data_identity(raw_data, stat,
+                                               full=integrity == 'full')
+    factors = _factors(raw_data, traces, offset=record_pars.get('offset'),
+                       conversion=record_pars.get('conversion'),
+                       inversion=record_pars.get('inversion'))
+    offset, conversion, inversion = factors
+    data = _convert_data(raw_data, dtype, offset, inversion, conversion)
+
+    # Cache the converted data on disk, see `Record._save_cachefile()`
+    root = getattr(datasource, '_root', None)
+    cachedir = getattr(root, '_v_cachedir', None)
+    if cachedir is not None and stat is not None:
+        filename = _cachefile_name(cachedir, rc_class, group, name, dtype,
+                                   dataident_fast,
+                                   (offset, inversion, conversion))
+        try:
+            if not os.path.isfile(filename):
+                _write_cachefile(filename, data)
+            data = np.load(filename, mmap_mode='r')
+        except (OSError, ValueError):
+            pass
 
-    return record
+    datasource._v_prepared = (dataident, dataident_fast, factors, data)
@@ -6,6 +6,7 @@ Created on Wed Mar  9 17:09:09 2016
 """
 import collections
 import numpy as np
+import time
 try:
     import pandas as pd
     __pd__ = True
@@ -14,9 +15,12 @@ except ImportError:
 from abc import ABCMeta, abstractmethod, abstractproperty
 
 from .. import helpers as hp
+from ..cache import manager as cache_manager
+from ..parallel import pool as parallel_pool
 from .. import traces as tc
 from ..graph import GraphMember
 from ..evaluate import signal as sn
+from .selection import Selection
 
 
 class Region(GraphMember, metaclass=ABCMeta):
@@ -27,6 +31,24 @@ class Region(GraphMember, metaclass=ABCMeta):
     (start/stop or tmin/tmax). The region can be defined as a timespan
     (seconds) or an indexspan (indexes of a numpy array).
     """
+    # Cached data. ZODB volatile.
+    _v_data_cached = None
+    # Cached tiles of the data, {(block, trace_idx): 1D numpy.ndarray}. ZODB
+    # volatile.
+    _v_tiles = None
+    # Number of samples of the tiles the data is cached in, if only parts of
+    # the data are requested. None caches all data at once.
+    tile_size = 2**16
+    # Level of detail pyramid of the data, see `_pyramid()`. ZODB volatile.
+    _v_pyramid = None
+    # Number of samples of the blocks of the finest level of the pyramid
+    envelope_block = 64
+    # Memoized trace selections, (`tc.version`, {traces: traces_idx}), see
+    # `traces_to_idx()`. ZODB volatile.
+    _v_traces_idx = None
+    # Split large requests into blocks of samples, which are requested in
+    # parallel, if `pyoti.parallel.pool` has more than one worker
+    parallel = True
 
     def __init__(self, caching=False, **kwargs):
         """
@@ -135,6 +157,13 @@ class Region(GraphMember, metaclass=ABCMeta):
     def num_traces(self):
         return self.data.shape[0]
 
+    @property
+    def dtype(self):
+        """
+        The floating point type of the data of this region.
+        """
+        return np.dtype(float)
+
     @property
     def caching(self):
         return self._caching
@@ -147,8 +176,8 @@ class Region(GraphMember, metaclass=ABCMeta):
         """
         self._caching = caching
         if not caching:
-            # delete cache to free memory, ZODB volatile
-            self._v_data_cached = None
+            # delete cache to free memory
+            self._clear_cache()
 
     def get_data(self, traces=None, samples=None, moving_filter='mean',
                  window=1, decimate=1, copy=True, pandas=False):
@@ -190,7 +219,13 @@ class Region(GraphMember, metaclass=ABCMeta):
         traces_idx = self.traces_to_idx(traces)
         samples = self.samples_idx(samples, decimate)
 
-        if window <= 1:
+        blocks = [samples]
+        if self.parallel and isinstance(samples, slice):
+            blocks = parallel_pool.blocks(samples)
+        if len(blocks) > 1:
+            data = self._get_data_parallel(blocks, traces_idx, moving_filter,
+                                           window)
+        elif window <= 1:
             # Return unfiltered data
             data = self._get_data(samples, traces_idx, copy)
         else:
@@ -209,17 +244,30 @@ class Region(GraphMember, metaclass=ABCMeta):
             filter_samples = slice(filter_start, filter_stop, 1)
             data = self._get_data(filter_samples, traces_idx, copy=False)
 
-            # Filter the data
-            data = hp.moving_filter(data, window, moving_filter=moving_filter)
-
-            # Return requested samples, considering decimating factor
+            # Requested samples, considering decimating factor
             if isinstance(samples, slice):
                 start = samples_start - filter_start
                 stop = samples_stop - filter_start
-                samples = slice(start, stop, samples.step)
+                points = slice(start, stop, samples.step)
             else:  # samples is numpy.ndarray
-                samples = samples - filter_start
-            data = data[samples]
+                points = samples - filter_start
+
+            sparse = isinstance(points, slice) and points.step >= window
+            median = moving_filter == 'median'
+            if (sparse or median) and len(data) >= window:
+                # The data is decimated at least by the window size, i.e.
+                # the windows of the requested samples do not overlap, or the
+                # running median can slide along the requested samples. Only
+                # filter the requested samples.
+                data = hp.moving_filter_points(data, window, points,
+                                               moving_filter=moving_filter)
+            else:
+                # Filter the data
+                data = hp.moving_filter(data, window,
+                                        moving_filter=moving_filter)
+
+                # Return requested samples
+                data = data[points]
 
         if pandas and __pd__:
             return pd.DataFrame(data, index=self.timevector[samples],
@@ -227,14 +275,252 @@ class Region(GraphMember, metaclass=ABCMeta):
 
         return data
 
+    def select(self, traces=None, samples=None, decimate=1,
+               moving_filter='mean', window=1):
+        """
+        Returns a lazy selection of the data of this region.
+
+        The selection can be narrowed further (traces, samples, decimation),
+        filtered and extended by derived computations, without requesting any
+        data. Upon `Selection.compute()`, the data is requested with a single
+        call of `get_data()`, i.e. only the finally selected samples are read
+        and modified. For example,
+        `region.select('psdX').filter(50)[1000:5000].decimate(10).compute()`
+        reads only the samples 1000 to 5000 (plus the context of the filter).
+
+        Parameters
+        ----------
+        See `get_data()`.
+
+        Returns
+        -------
+        Selection
+        """
+        return Selection(self, traces=traces, samples=samples,
+                         decimate=decimate, moving_filter=moving_filter,
+                         window=window)
+
+    def iter_chunks(self, chunk_size=2**16, overlap=0, traces=None,
+                    decimate=1, moving_filter='mean', window=1, samples=None,
+                    copy=True):
+        """
+        Iterate over the data of this region in chunks of bounded size.
+
+        Every chunk is requested with `get_data()`, which reads the samples
+        needed for the moving filter before and after the chunk. Therefore,
+        the concatenated chunks (without overlap) are the same as the data
+        returned by a single call of `get_data()`, while at most `chunk_size`
+        + `overlap` + 2 * `window` samples are held in memory at once. Switch
+        off caching, to not keep the whole data cached.
+
+        Parameters
+        ----------
+        chunk_size : int, optional
+            The number of samples of this region (before decimation) per
+            chunk. Rounded up to a multiple of the decimation.
+        overlap : int, optional
+            The number of samples (before decimation) every chunk additionally
+            contains of the preceding chunk, e.g. as context for an analysis
+            of the chunks.
+        traces : str or list of str, optional
+        decimate : int, optional
+        moving_filter : str, optional
+        window : int, optional
+        samples : slice, optional
+            The samples of the region to iterate over. Defaults to all
+            samples. See `get_data()` for `decimate` and `samples.step`.
+        copy : bool, optional
+            See `get_data()`.
+
+        Yields
+        ------
+        samples : slice
+            The samples of this region contained in the chunk.
+        data : 2D numpy.ndarray
+            The data of the chunk.
+        """
+        samples = self.samples_idx(samples, decimate)
+        if not isinstance(samples, slice) or samples.step < 1:
+            raise ValueError("Only slices with a positive step can be "
+                             "iterated over in chunks.")
+        step = samples.step
+        chunk_size = max(1, -(-int(chunk_size) // step)) * step
+        overlap = -(-max(0, int(overlap)) // step) * step
+
+        for start in range(samples.start, samples.stop, chunk_size):
+            chunk = slice(max(samples.start, start - overlap),
+                          min(start + chunk_size, samples.stop), step)
+            data = self.get_data(traces=traces, samples=chunk,
+                                 moving_filter=moving_filter, window=window,
+                                 copy=copy)
+            yield chunk, data
+
+    def get_envelope(self, tmin=None, tmax=None, width=1000, traces=None):
+        """
+        Returns the envelope (minimum, maximum, and mean) of the data of this
+        region between `tmin` and `tmax`, reduced to roughly `width` bins.
+
+        The envelope is meant for plotting, where only a few thousand points
+        can be shown anyway. If caching is switched on, the bins are taken
+        from a level of detail pyramid (min/max/mean of blocks of
+        `envelope_block` * 2**level samples), which is calculated once.
+        Therefore, the time to get the envelope does not depend on the
+        length of the requested timespan. Otherwise, the envelope is
+        calculated from the requested data.
+
+        Parameters
+        ----------
+        tmin : float, optional
+            Start time of the envelope in s. Defaults to the start of the
+            region.
+        tmax : float, optional
+            Stop time of the envelope in s. Defaults to the end of the region.
+        width : int, optional
+            The number of bins to reduce the data to (e.g. the width of a plot
+            in pixels). The envelope has at least `width` and at most about
+            2 * `width` bins.
+        traces : str or list of str, optional
+
+        Returns
+        -------
+        timevector : 1D numpy.ndarray
+            The centers of the bins in s.
+        mins : 2D numpy.ndarray
+            The minima of the bins.
+        maxs : 2D numpy.ndarray
+            The maxima of the bins.
+        means : 2D numpy.ndarray
+            The means of the bins.
+            If the timespan has less than 2 * `width` samples, `mins`, `maxs`,
+            and `means` are the (read-only) data itself.
+        """
+        traces_idx = self.traces_to_idx(traces)
+        samplingrate = self.samplingrate
+        start = 0
+        stop = self.datapoints
+        if tmin is not None:
+            start = min(max(start, int(np.ceil(tmin * samplingrate))), stop)
+        if tmax is not None:
+            stop = max(min(stop, int(np.floor(tmax * samplingrate)) + 1),
+                       start)
+        block = (stop - start) // max(int(width), 1)
+
+        if block <= 1:
+            data = self._get_data(slice(start, stop, 1), traces_idx,
+                                  copy=False)
+            return self.timevector[start:stop], data, data, data
+
+        # Pieces of the envelope (starts, stops, mins, maxs, means)
+        pieces = []
+        base = self.envelope_block
+        pyramid = None
+        if self.caching and base and block >= base:
+            pyramid = self._pyramid()
+        if pyramid:
+            level = min(int(np.log2(block // base)), len(pyramid) - 1)
+            size = base * 2**level
+            first = -(-start // size)
+            last = min(stop // size, len(pyramid[level][0]))
+            if last > first:
+                # Partial blocks at the beginning and the end of the timespan
+                # are reduced from the data, the full blocks in between are
+                # taken from the pyramid
+                self._envelope_pieces(pieces, start, first * size, block,
+                                      traces_idx)
+                mins, maxs, means = pyramid[level]
+                blocks = slice(first, last)
+                starts = np.arange(first, last) * size
+                pieces.append((starts, starts + size,
+                               mins[blocks][:, traces_idx],
+                               maxs[blocks][:, traces_idx],
+                               means[blocks][:, traces_idx]))
+                self._envelope_pieces(pieces, last * size, stop, block,
+                                      traces_idx)
+        if not pieces:
+            self._envelope_pieces(pieces, start, stop, block, traces_idx)
+
+        starts, stops, mins, maxs, means = [np.concatenate(piece)
+                                            for piece in zip(*pieces)]
+        timevector = (starts + stops - 1) / 2 / samplingrate
+        return timevector, mins, maxs, means
+
+    def _envelope_pieces(self, pieces, start, stop, block, traces_idx):
+        """
+        Reduce the data from `start` to `stop` to bins of `block` samples and
+        append the envelope to `pieces`.
+        """
+        if stop <= start:
+            return
+        data = self._get_data(slice(start, stop, 1), traces_idx, copy=False)
+        mins, maxs, means = hp.envelope(data, block)
+        starts = np.arange(start, stop, block)
+        stops = np.minimum(starts + block, stop)
+        pieces.append((starts, stops, mins, maxs, means))
+
+    def _pyramid(self):
+        """
+        Returns the level of detail pyramid of the data of all traces.
+
+        The level `i` of the pyramid is a tuple of the minima, maxima, and
+        means of consecutive blocks of `envelope_block` * 2**i samples. Only
+        full blocks are contained. If caching is switched on, the pyramid is
+        calculated once and kept until the data changes.
+        """
+        pyramid = self._v_pyramid
+        if pyramid is None:
+            data = self._get_data(self.indexspan, self.traces_to_idx(),
+                                  copy=False)
+            base = self.envelope_block
+            full = len(data) // base * base
+            pyramid = []
+            if full > 0:
+                pyramid.append(hp.envelope(data[:full], base))
+            while pyramid and len(pyramid[-1][0]) >= 2:
+                mins, maxs, means = pyramid[-1]
+                pairs = len(mins) // 2 * 2
+                pyramid.append((np.minimum(mins[0:pairs:2], mins[1:pairs:2]),
+                                np.maximum(maxs[0:pairs:2], maxs[1:pairs:2]),
+                                (means[0:pairs:2] + means[1:pairs:2]) / 2))
+            if self.caching:
+                self._v_pyramid = pyramid  # ZODB volatile
+        return pyramid
+
+    def _get_data_parallel(self, blocks, traces_idx, moving_filter, window):
+        """
+        Returns the data of the blocks of samples `blocks`, which are
+        requested concurrently in the threads of `pyoti.parallel.pool`.
+        """
+        traces = self.idx_to_traces(traces_idx)
+
+        def get_data(samples):
+            return self.get_data(traces=traces, samples=samples,
+                                 moving_filter=moving_filter, window=window,
+                                 copy=False)
+
+        # Request the first sample serially, to evaluate the modifications and
+        # to load the caches the blocks depend on, only once
+        first = blocks[0]
+        get_data(slice(first.start, first.start + 1, first.step))
+
+        return np.concatenate(parallel_pool.map(get_data, blocks))
+
     def _get_data(self, samples, traces_idx, copy=True):
         """
         Returns the data for the given samples and traces_idx.
         """
         # Retrieve cached data
         if self.caching:
+            # If not all data is cached, calculate and cache only the tiles of
+            # the data needed for the request
+            if self._v_data_cached is None and self.tile_size:
+                return self._get_data_tiled(samples, traces_idx)
+
             # If the cache is outdated or not yet created, do so
             self.update_cache()
+            data_cached = self._v_data_cached
+            if data_cached is None:
+                # Cache has been evicted in the meantime by the cache manager
+                return self._get_data_uncached(samples, traces_idx, copy)
 
             # Check, if traces and/or samples are instances of numpy.ndarray
             traces_is_ndarray = isinstance(traces_idx, np.ndarray)
@@ -248,28 +534,130 @@ class Region(GraphMember, metaclass=ABCMeta):
                 # numpy. Therefore, separate the indexing into two steps.
                 if traces_is_ndarray and samples_is_ndarray:
                     # First, select the samples.
-                    data_ = self._v_data_cached[samples]
+                    data_ = data_cached[samples]
 
                     # Second, select the traces.
                     return data_[:, traces_idx]
 
-                # Advanced indexing automatically returns a copy of the data.
-                # There is no need to extra copy via ndarray.copy(), which
-                # would cost some extra execution time.
-                copy = False
+                # Advanced indexing automatically returns a (writeable) copy
+                # of the data. There is no need to extra copy via
+                # ndarray.copy(), which would cost some extra execution time.
+                return data_cached[samples, traces_idx]
 
             if copy:
                 # Per default return a copy of the data cache to protect it
                 # from unwanted in place modifications
-                return self._v_data_cached[samples, traces_idx].copy()
+                return data_cached[samples, traces_idx].copy()
             else:
                 # Only, if explicitly asked for "copy=False", return a
-                # direct reference to the cached data
-                return self._v_data_cached[samples, traces_idx]
+                # direct, read-only reference to the cached data
+                data = data_cached[samples, traces_idx]
+                data.flags.writeable = False
+                return data
 
         # No caching enabled, return uncached data
         return self._get_data_uncached(samples, traces_idx, copy)
 
+    def _get_data_tiled(self, samples, traces_idx):
+        """
+        Returns the data for the given samples and traces_idx from the tile
+        cache. The data is cached in tiles of `self.tile_size` samples of one
+        trace. Only the tiles touched by the request, which are not yet cached,
+        are calculated.
+        """
+        tiles = self._v_tiles
+        if tiles is None:
+            tiles = {}
+            self._v_tiles = tiles  # ZODB volatile
+        size = self.tile_size
+        traces = np.arange(self.num_traces)[traces_idx]
+
+        if isinstance(samples, slice) and samples.step > 0:
+            samples = range(samples.start, samples.stop, samples.step)
+            if len(samples) > 0:
+                blocks = range(samples.start // size,
+                               samples[-1] // size + 1)
+            else:
+                blocks = range(0)
+        else:
+            samples = np.arange(self.datapoints)[samples]
+            blocks = np.unique(samples // size)
+        self._fill_tiles(tiles, blocks, traces)
+
+        data = np.empty((len(samples), len(traces)), dtype=self.dtype)
+        if isinstance(samples, range):
+            start, stop, step = samples.start, samples.stop, samples.step
+            i = 0
+            for block in blocks:
+                b_start = block * size
+                # First sample in this block, considering the step
+                first = start + max(0, -(-(b_start - start) // step)) * step
+                last = min(stop, b_start + size)
+                if first >= last:
+                    continue
+                length = len(range(first, last, step))
+                for j, trace in enumerate(traces):
+                    tile = tiles[block, trace]
+                    data[i:i + length, j] = tile[first - b_start:
+                                                 last - b_start:step]
+                i += length
+        else:
+            samples_block = samples // size
+            for block in blocks:
+                selected = samples_block == block
+                positions = samples[selected] - block * size
+                for j, trace in enumerate(traces):
+                    data[selected, j] = tiles[block, trace][positions]
+        return data
+
+    def _fill_tiles(self, tiles, blocks, traces):
+        """
+        Calculate the not yet cached tiles of `blocks` and `traces`. Adjacent
+        missing tiles are calculated with one call of `_get_data_uncached()`.
+        """
+        size = self.tile_size
+        missing = [block for block in blocks
+                   if any((block, trace) not in tiles for trace in traces)]
+        if not missing:
+            cache_manager.touch(self)
+            return
+
+        # Coalesce adjacent missing blocks into runs
+        runs = [[missing[0]]]
+        for block in missing[1:]:
+            if block == runs[-1][-1] + 1:
+                runs[-1].append(block)
+            else:
+                runs.append([block])
+
+        start_time = time.perf_counter()
+        nbytes = 0
+        for run in runs:
+            run_traces = [trace for trace in traces
+                          if any((block, trace) not in tiles
+                                 for block in run)]
+            start = run[0] * size
+            stop = min((run[-1] + 1) * size, self.datapoints)
+            data = self._get_data_uncached(slice(start, stop, 1),
+                                           hp.slicify(run_traces),
+                                           copy=True)
+            for block in run:
+                b_start = block * size - start
+                for j, trace in enumerate(run_traces):
+                    tile = data[b_start:b_start + size, j].copy()
+                    tiles[block, trace] = tile
+                    nbytes += tile.nbytes
+
+        extend = self._v_tiles is tiles
+        if not extend:
+            # The cache has been cleared during the calculation (e.g. by a
+            # modification recalculating its parameters). Keep the calculated
+            # tiles, like `update_cache()` keeps the calculated data.
+            self._v_tiles = tiles  # ZODB volatile
+            nbytes = sum(tile.nbytes for tile in tiles.values())
+        cache_manager.add(self, time.perf_counter() - start_time,
+                          nbytes=nbytes, extend=extend)
+
     def update_cache(self, force=False):
         """
         Create and update cached data.
@@ -285,9 +673,170 @@ class Region(GraphMember, metaclass=ABCMeta):
                              or force):
             # An update is needed, calculate data for self.indexspan and
             # all traces_idx and store it in the cache. ZODB volatile.
-            self._v_data_cached = self._get_data_uncached(self.indexspan,
-                                                          self.traces_to_idx(),
-                                                          copy=True)
+            start = time.perf_counter()
+            if self._v_tiles and not force:
+                # Calculate only the tiles, which are not yet cached
+                data = self._get_data_tiled(self.indexspan,
+                                            self.traces_to_idx())
+            else:
+                data = self._get_data_uncached(self.indexspan,
+                                               self.traces_to_idx(),
+                                               copy=True)
+            self._v_data_cached = data
+            self._v_tiles = None
+            # Let the cache manager account for the new cache, which may
+            # evict the caches of other regions
+            cache_manager.add(self, time.perf_counter() - start)
+        elif self.caching:
+            cache_manager.touch(self)
+
+    @staticmethod
+    def _shift_segments(name, index, shift):
+        """
+        Translate an index shift into the segments of the samples, which are
+        unaffected by the shift.
+
+        Parameters
+        ----------
+        name : str
+            'start' or 'stop'. A shift of the stop (shift > 0) inserts `shift`
+            samples at `index`, a negative shift removes the samples
+            [index + shift, index). A shift of the start (shift > 0) removes
+            the samples [index, index + shift), a negative shift inserts
+            -`shift` samples at `index`.
+        index : int
+        shift : int
+
+        Returns
+        -------
+        list of (int, int or None, int)
+            Every segment (start, stop, offset) states, that the new samples
+            [start, stop) are the old samples [start + offset, stop + offset).
+            A stop of None denotes the end of the data.
+        """
+        if name == 'stop':
+            cut = index + min(shift, 0)
+            resume = cut + max(shift, 0)
+            offset = - shift
+        else:  # name == 'start'
+            cut = index
+            resume = index + max(- shift, 0)
+            offset = shift
+        return [(0, cut, 0), (resume, None, offset)]
+
+    def _shift_cache(self, segments):
+        """
+        Rearrange the cached data after the samples of this region have been
+        shifted, instead of deleting it. Only the tiles of the samples, which
+        can not be (completely) taken from the old cached data, are dropped
+        and recalculated upon the next request.
+
+        Parameters
+        ----------
+        segments : list of (int, int or None, int)
+            The samples of the old cached data to be kept, see
+            `_shift_segments()`.
+
+        Returns
+        -------
+        bool
+            True, if the cache has been rearranged. False, if the cache could
+            not be rearranged and needs to be deleted.
+        """
+        data = self._v_data_cached
+        tiles = self._v_tiles
+        if data is None and tiles is None:
+            return True
+        if not self.tile_size:
+            return False
+        size = self.tile_size
+        datapoints = self.datapoints
+        traces = range(self.num_traces)
+
+        def old_samples(trace, start, stop):
+            # Return the old cached samples [start, stop) of `trace` or None
+            if start < 0:
+                return None
+            if data is not None:
+                if stop > data.shape[0]:
+                    return None
+                return data[start:stop, trace]
+            if start % size == 0:
+                tile = tiles.get((start // size, trace))
+                if tile is not None and len(tile) == stop - start:
+                    # Reuse the unchanged tile
+                    return tile
+            parts = []
+            for block in range(start // size, (stop - 1) // size + 1):
+                tile = tiles.get((block, trace))
+                b_start = block * size
+                if tile is None or len(tile) < min(stop, b_start + size) \
+                        - b_start:
+                    return None
+                parts.append(tile[max(start - b_start, 0):stop - b_start])
+            return np.concatenate(parts)
+
+        def pieces(start, stop):
+            # Get the pieces of old samples of the new samples [start, stop)
+            pieces = []
+            for s_start, s_stop, offset in segments:
+                if s_stop is None:
+                    s_stop = datapoints
+                p_start = max(start, s_start)
+                p_stop = min(stop, s_stop)
+                if p_start < p_stop:
+                    pieces.append((p_start + offset, p_stop + offset))
+            if sum(p_stop - p_start for p_start, p_stop in pieces) \
+                    != stop - start:
+                return None
+            return pieces
+
+        # Keep all data at once, if all new samples are covered by old samples
+        if data is not None:
+            data_pieces = pieces(0, datapoints)
+            if data_pieces is not None and all(
+                    p_start >= 0 and p_stop <= data.shape[0]
+                    for p_start, p_stop in data_pieces):
+                data = np.concatenate([data[p_start:p_stop]
+                                       for p_start, p_stop in data_pieces])
+                self._v_data_cached = data  # ZODB volatile
+                cache_manager.resize(self, data.nbytes)
+                return True
+
+        new_tiles = {}
+        for block in range(- (- datapoints // size)):
+            b_start = block * size
+            b_stop = min(b_start + size, datapoints)
+            block_pieces = pieces(b_start, b_stop)
+            if block_pieces is None:
+                continue
+            for trace in traces:
+                parts = [old_samples(trace, p_start, p_stop)
+                         for p_start, p_stop in block_pieces]
+                if any(part is None for part in parts):
+                    continue
+                if len(parts) == 1 and parts[0].base is None:
+                    new_tiles[block, trace] = parts[0]
+                else:
+                    # Copy the samples into a new contiguous tile
+                    new_tiles[block, trace] = np.concatenate(parts)
+
+        # ZODB volatile
+        self._v_data_cached = None
+        self._v_tiles = new_tiles
+        cache_manager.resize(self, sum(tile.nbytes
+                                       for tile in new_tiles.values()))
+        return True
+
+    def _clear_cache(self):
+        """
+        Delete the cached data and all cached tiles.
+        """
+        # ZODB volatile
+        self._v_data_cached = None
+        self._v_tiles = None
+        self._v_pyramid = None
+        cache_manager.remove(self)
 
     @abstractmethod
     def _get_data_uncached(self, samples, traces_idx, copy=True):
@@ -295,14 +844,17 @@ class Region(GraphMember, metaclass=ABCMeta):
 
     def member_changed(self, ancestor=True, calledfromself=False,
                        leave_cache=False, **kwargs):
-        # If self triggered a change, delete cache and trigger an update of the
-        # cache. `leave_cache` can prevent deleting of the cache.
-        if calledfromself and not leave_cache:
-            self._v_data_cached = None  # ZODB volatile
-        # If an ancestor triggered a change, delete cache and trigger an update
-        # of the cache. A triggered change of descendants is ignored.
-        if not calledfromself and ancestor:
-            self._v_data_cached = None  # ZODB volatile
+        # If self or an ancestor triggered a change, delete cache and trigger
+        # an update of the cache. A triggered change of descendants is ignored.
+        # `leave_cache` can prevent deleting of the cache, e.g. if the cache
+        # has already been shifted according to an index shift.
+        if (calledfromself or ancestor) and not leave_cache:
+            self._clear_cache()
+        if calledfromself or ancestor:
+            # The level of detail pyramid is never shifted
+            self._v_pyramid = None  # ZODB volatile
+            # The traces could have changed (e.g. a new parent)
+            self._v_traces_idx = None  # ZODB volatile
 
         # Call method of superclass `GraphMember`
         super().member_changed(ancestor=ancestor,
@@ -327,15 +879,62 @@ class Region(GraphMember, metaclass=ABCMeta):
             start, stop, step = traces.indices(self.num_traces)
             traces_idx = slice(start, stop, step)
         else:
-            traces_idx = []
-            for trace in tc.normalize(traces):
-                if trace in self.traces:
-                    traces_idx.append(self.traces.index(trace))
-                elif isinstance(trace, int) and trace < self.num_traces:
-                    traces_idx.append(trace)
+            # Resolve the names of the traces only once per selection
+            key = self._traces_key(traces)
+            memo = self._traces_memo()
+            traces_idx = memo.get(key) if key is not None else None
+            if traces_idx is None:
+                traces_idx = self._resolve_traces(traces)
+                if key is not None:
+                    memo[key] = traces_idx
+            if isinstance(traces_idx, np.ndarray):
+                # Protect the memoized index array
+                return traces_idx.copy()
+            return traces_idx
 
         return hp.slicify(traces_idx, length=self.num_traces)
 
+    def _resolve_traces(self, traces):
+        region_traces = self.traces
+        num_traces = self.num_traces
+        traces_idx = []
+        for trace in tc.normalize(traces):
+            if trace in region_traces:
+                traces_idx.append(region_traces.index(trace))
+            elif isinstance(trace, int) and trace < num_traces:
+                traces_idx.append(trace)
+        return hp.slicify(traces_idx, length=num_traces)
+
+    @staticmethod
+    def _traces_key(traces):
+        """
+        Returns a hashable key for the trace selection `traces`, or None.
+        """
+        # Key by type and value, as e.g. True, 1 and 1.0 are equal
+        if isinstance(traces, (str, int)):
+            return (type(traces), traces)
+        if isinstance(traces, np.ndarray):
+            traces = traces.tolist()
+        if isinstance(traces, (list, tuple)):
+            key = tuple((type(trace), trace) for trace in traces)
+            try:
+                hash(key)
+            except TypeError:
+                return None
+            return key
+        return None
+
+    def _traces_memo(self):
+        """
+        Returns the dict of memoized trace selections, which is reset whenever
+        the aliases of the traces are reloaded.
+        """
+        memo = self._v_traces_idx
+        if memo is None or memo[0] != tc.version:
+            memo = (tc.version, {})
+            self._v_traces_idx = memo  # ZODB volatile
+        return memo[1]
+
     def idx_to_traces(self, traces_idx=None):
         if isinstance(traces_idx, slice):
             traces_idx = hp.listify(traces_idx)
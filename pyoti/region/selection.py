@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Lazy selections of the data of a Region.
+
+A `Selection` (see `Region.select()`) collects the selection of traces,
+samples, the decimation, a moving filter and derived computations, without
+requesting any data. Only upon `Selection.compute()`, the whole plan is
+executed with a single call of `Region.get_data()`, which passes the requested
+samples down to the Record. Therefore, only the needed samples are read and
+modified.
+"""
+import numpy as np
+
+
+class Selection(object):
+    """
+    Deferred selection of the data of a Region.
+
+    All methods return a new Selection and leave the original one untouched.
+    The samples of a Selection are addressed relative to the selection (i.e.
+    after decimation), like the rows of the data returned by `compute()`.
+    """
+    def __init__(self, region, traces=None, samples=None, decimate=1,
+                 moving_filter='mean', window=1):
+        """
+        Parameters
+        ----------
+        region : Region
+            The Region to select the data from.
+        traces : str or list of str, optional
+            See `Region.get_data()`.
+        samples : int, slice, list of int or index array, optional
+            See `Region.get_data()`.
+        decimate : int, optional
+            See `Region.get_data()`.
+        moving_filter : str, optional
+            See `Region.get_data()`.
+        window : int, optional
+            See `Region.get_data()`.
+        """
+        self.region = region
+        self._traces = region.idx_to_traces(region.traces_to_idx(traces))
+        samples = region.samples_idx(samples, decimate)
+        if isinstance(samples, slice):
+            samples = range(samples.start, samples.stop, samples.step)
+        # The samples of the region, either a range or an index array
+        self._samples = samples
+        self._moving_filter = moving_filter
+        self._window = window
+        # Derived computations, applied to the data in the given order
+        self._functions = []
+
+    def _copy(self):
+        selection = object.__new__(Selection)
+        selection.__dict__.update(self.__dict__)
+        selection._functions = list(self._functions)
+        return selection
+
+    @property
+    def traces(self):
+        """
+        The names of the selected traces.
+        """
+        return list(self._traces)
+
+    @property
+    def samples(self):
+        """
+        The selected samples of the region as a slice or an index array.
+        """
+        samples = self._samples
+        if isinstance(samples, range):
+            if samples.step > 0:
+                return slice(samples.start, samples.stop, samples.step)
+            samples = np.array(samples)
+        return samples
+
+    @property
+    def timevector(self):
+        return self.region.timevector[self.samples]
+
+    def __len__(self):
+        return len(self._samples)
+
+    @property
+    def shape(self):
+        """
+        The shape of the data of `compute()`, without derived computations.
+        """
+        return (len(self), len(self._traces))
+
+    def select(self, traces=None, samples=None, decimate=1):
+        """
+        Narrow the selection.
+
+        Parameters
+        ----------
+        traces : str or list of str, optional
+            Traces contained in this selection. Defaults to all traces of this
+            selection.
+        samples : int, slice, list of int or index array, optional
+            Samples relative to this selection.
+        decimate : int, optional
+            Decimate the selected samples by given value. If `samples` is a
+            slice with an explicit step, the step takes precedence.
+
+        Returns
+        -------
+        Selection
+        """
+        selection = self._copy()
+        if traces is not None:
+            traces = self.region.idx_to_traces(
+                self.region.traces_to_idx(traces))
+            missing = [trace for trace in traces if trace not in self._traces]
+            if missing:
+                raise ValueError("The traces %s are not part of the selection."
+                                 % missing)
+            selection._traces = traces
+        if isinstance(samples, int):
+            samples = slice(samples, samples + 1 if samples != -1 else None)
+        if samples is None:
+            samples = slice(None, None, decimate or 1)
+        elif isinstance(samples, slice) and samples.step is None:
+            samples = slice(samples.start, samples.stop, decimate or 1)
+        elif not isinstance(samples, slice):
+            samples = np.asarray(samples)[::decimate or 1]
+        if isinstance(samples, slice) and isinstance(self._samples, range):
+            # Compose the ranges, without materializing any index
+            selection._samples = self._samples[samples]
+        else:
+            selection._samples = np.asarray(self._samples)[samples]
+        return selection
+
+    def __getitem__(self, samples):
+        return self.select(samples=samples)
+
+    def decimate(self, decimate):
+        """
+        Decimate the selected samples by `decimate`.
+        """
+        return self.select(decimate=decimate)
+
+    def filter(self, window, moving_filter='mean'):
+        """
+        Apply a moving filter with a window of `window` samples of the region.
+
+        As for `Region.get_data()`, the filter is applied to the data of the
+        region before the decimation, independent of the order the selection
+        was composed in.
+
+        Parameters
+        ----------
+        window : int
+        moving_filter : str, optional
+            Can be one of 'mean' or 'median'.
+
+        Returns
+        -------
+        Selection
+        """
+        if self._functions:
+            raise ValueError("A moving filter has to be applied before any "
+                             "derived computation.")
+        selection = self._copy()
+        selection._window = window
+        selection._moving_filter = moving_filter
+        return selection
+
+    def apply(self, function, *args, **kwargs):
+        """
+        Add a derived computation: `function(data, *args, **kwargs)` is called
+        with the selected data upon `compute()`.
+
+        The function has to operate on every sample (row) separately, e.g.
+        the conversion of a displacement into a force. This allows to select
+        samples after the computation, which are still read from the region
+        only.
+
+        Returns
+        -------
+        Selection
+        """
+        selection = self._copy()
+        selection._functions.append((function, args, kwargs))
+        return selection
+
+    def compute(self, copy=True):
+        """
+        Execute the selection and return the data.
+
+        Parameters
+        ----------
+        copy : bool, optional
+            See `Region.get_data()`.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        data = self.region.get_data(traces=self._traces,
+                                    samples=self.samples,
+                                    moving_filter=self._moving_filter,
+                                    window=self._window,
+                                    copy=copy)
+        for function, args, kwargs in self._functions:
+            data = function(data, *args, **kwargs)
+        return data
+
+    def __repr__(self):
+        return ("Selection of %s: traces %s, %i samples, %s filter window %i, "
+                "%i derived computations"
+                % (self.region.name, self._traces, len(self),
+                   self._moving_filter, self._window, len(self._functions)))
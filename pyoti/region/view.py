@@ -8,6 +8,7 @@ import collections
 import numpy as np
 import operator
 
+from .. import parallel as pl
 from .region import Region
 from .record import Record
 from ..modification import Modification
@@ -21,6 +22,9 @@ class View(Region):
     The region of a View of the data to refer to can (in contrast to a Record)
     be choosen by setter methods (start, stop, tmin, tmax).
     """
+    # Modification plans for traces selections, see `_modification_plan()`.
+    # ZODB volatile.
+    _v_modplan = None
 
     def __init__(self, parent=None, sticky_start=True, sticky_stop=True,
                  **kwargs):
@@ -156,6 +160,12 @@ class View(Region):
             return []
         return self.parent.traces
 
+    @property
+    def dtype(self):
+        if self.parent is None:
+            return np.dtype(float)
+        return self.parent.dtype
+
     @property
     def samplingrate(self):
         if self.parent is None:
@@ -216,7 +226,7 @@ class View(Region):
                 self.set_changed(level=1, index_shift=shift)
 
     def member_changed(self, ancestor=True, calledfromself=False,
-                       index_shift=None, **kwargs):
+                       index_shift=None, leave_cache=False, **kwargs):
         # If a change of an ancestor View or a MultiRegion was triggered by an
         # index_shift, check, if this index_shift of the ancestor necessitates
         # an update of self.stop or self.start. If yes, then set self.stop or
@@ -224,7 +234,10 @@ class View(Region):
         # the change (The children of a View or a MultiRegion are informed upon
         # an index_shift, see call of set_changed() in property start/stop).
         # A change of descendants should be ignored.
+        # Any change could change the modifications of this View.
+        self._v_modplan = None  # ZODB volatile
         if index_shift is not None and not calledfromself and ancestor:
+            start = self._start
             if not self._update_index(index_shift):
                 # It was not necessary to change start and stop, this means,
                 # the data this View offers was not changed and in turn the
@@ -232,10 +245,47 @@ class View(Region):
                 # not trigger the recaching nor set the self.updated to False
                 # (-> do not call super.member_changed())
                 return
+            # Shift the cached data according to the index_shift of the parent
+            # and the shift of self.start, instead of recalculating it.
+            caller, name, index, shift = index_shift
+            segments = [(s_start - self._start,
+                         None if s_stop is None else s_stop - self._start,
+                         offset + self._start - start)
+                        for s_start, s_stop, offset
+                        in self._shift_segments(name, index, shift)]
+            leave_cache = self._shift_view_cache(segments)
+        elif index_shift is not None and calledfromself and not leave_cache:
+            # Self changed start or stop
+            leave_cache = self._shift_view_cache(
+                self._shift_segments(*index_shift[1:]))
 
         # Set or unset cached data and update update status
         super().member_changed(ancestor=ancestor,
-                               calledfromself=calledfromself, **kwargs)
+                               calledfromself=calledfromself,
+                               leave_cache=leave_cache, **kwargs)
+
+    def _shift_view_cache(self, segments):
+        # The data of applied modifications could depend on the position of
+        # the samples within this View or within the Views this View is
+        # derived from. Therefore, only shift the cached data, if no
+        # modification is applied to this View or any of its ancestors.
+        if self._modified():
+            return False
+        return self._shift_cache(segments)
+
+    def _modified(self):
+        """
+        Is an active modification applied to this View or to any View between
+        this View and the Record?
+        """
+        regions = [self]
+        while regions:
+            region = regions.pop()
+            if isinstance(region, View) and any(
+                    mod.active for mod in region.modifications()):
+                return True
+            regions.extend(region.parent_instances(Region))
+        return False
 
     def _update_index(self, index_shift):
         """
@@ -265,6 +315,8 @@ class View(Region):
         # Initialize start and stop, in case there is now shift
         start = self._start
         stop = self._stop
+        datapoints = stop - start
+        informed = False
 
         returnvalue = False
 
@@ -324,6 +376,7 @@ class View(Region):
                 i_shift = (self, name, _index, _shift)
                 self.set_changed(level=1, index_shift=i_shift,
                                  includeself=False)
+                informed = True
 
         else:  # name == 'stop':
 
@@ -368,6 +421,14 @@ class View(Region):
                 i_shift = (self, name, _index, _shift)
                 self.set_changed(level=1, index_shift=i_shift,
                                  includeself=False)
+                informed = True
+
+        # A MultiRegion caches the datapoints of its parents. Inform it, if
+        # the datapoints of this View changed without the children being
+        # informed about an index shift.
+        if not informed and stop - start != datapoints:
+            for child in self.child_instances(MultiRegion):
+                child.set_changed(level=1)
 
         return returnvalue
 
@@ -379,6 +440,11 @@ class View(Region):
         Get data from parent.
         Apply all modifications registered at this View.
         Return data.
+
+        If no modification modifies the requested traces, the data of the
+        parent is passed through. With `copy` False, this is a read-only view
+        on the cached data of the parent. The data is only copied, if a
+        modification needs to modify it.
         """
 
         # parentize the requested samples, i.e. correct for self.start
@@ -391,14 +457,72 @@ class View(Region):
             # samples is an np.array
             p_samples = samples + self.start
 
-        data = self.parent._get_data(p_samples, traces_idx, copy)
+        # Get the active modifications, which modify the requested traces,
+        # except the ones suspended in the current thread
+        data_traces, plan = self._modification_plan(traces_idx)
+        suspended = pl.suspended()
+        if suspended:
+            plan = [step for step in plan if id(step[0]) not in suspended]
+
+        if not plan:
+            # Pass the data of the parent through
+            return self.parent._get_data(p_samples, traces_idx, copy)
+
+        data = self.parent._get_data(p_samples, traces_idx, copy=False)
+        # The modifications modify the data in place. Copy the data, if it
+        # could be a view on the cached data of the parent.
+        if data.base is not None or not data.flags.writeable:
+            data = data.copy()
 
         # modify data by applying all modifications to the unmodified data
-        for mod in self.modifications():
-            data = mod.modify(data, samples, traces_idx)
+        for mod, traces_apply, data_index, mod_index in plan:
+            data = mod._modify_indexed(data, samples, data_traces, data_index,
+                                       mod_index)
 
         return data
 
+    def _modification_plan(self, traces_idx):
+        """
+        Return the traces and the active modifications, which modify the
+        traces, for the traces selection `traces_idx`.
+
+        The plan is calculated once for every traces selection and kept until
+        the View or one of its ancestors (e.g. a modification) changes (see
+        `member_changed()`), a modification is (de)activated, or the
+        `traces_apply` of one of the modifications is set. Modifications,
+        which are suspended temporarily in a thread, are part of the plan.
+
+        Returns
+        -------
+        tuple of (list of str, list of tuple)
+            The traces of `traces_idx` and for every active modification,
+            which modifies at least one of the traces, a tuple of
+            (modification, traces_apply, data_index, mod_index), see
+            `Modification._modify_index()`.
+        """
+        if isinstance(traces_idx, slice):
+            key = (traces_idx.start, traces_idx.stop, traces_idx.step)
+        else:
+            key = tuple(traces_idx)
+        plans = self._v_modplan
+        if plans is None:
+            plans = {}
+            self._v_modplan = plans  # ZODB volatile
+        plan = plans.get(key)
+        if plan is None:
+            data_traces = self.idx_to_traces(traces_idx)
+            steps = []
+            for mod in self.modifications():
+                if not mod._switched_on:
+                    continue
+                index = mod._modify_index(data_traces)
+                if index is not None:
+                    steps.append((mod, mod._traces_apply) + index)
+            plan = (data_traces, steps)
+            plans[key] = plan
+
+        return plan
+
 
 class MultiRegion(Region):
     """
@@ -406,6 +530,9 @@ class MultiRegion(Region):
     to add and remove a parent and a method to serve the data of all parents
     concatenated. Inherits from class Region.
     """
+    # Parents and their cumulative start indices, see `_offsets()`. ZODB
+    # volatile.
+    _v_offsets = None
     def __init__(self, parent=None, **kwargs):
         """
         Parameters
@@ -439,7 +566,7 @@ class MultiRegion(Region):
             self.add_parent(parent)
 
     def member_changed(self, ancestor=True, calledfromself=False,
-                       index_shift=None, **kwargs):
+                       index_shift=None, leave_cache=False, **kwargs):
         # Possible causes of an index shift:
         #    1. index shift of parent
         #    2. adding or removing a parent
@@ -454,17 +581,15 @@ class MultiRegion(Region):
         # are informed upon an index_shift, see call of set_changed() in
         # property start/stop).
         # A change of descendants should be ignored.
+        # Any change could change the datapoints of the parents.
+        self._v_offsets = None  # ZODB volatile
         if index_shift is not None and not calledfromself and ancestor:
             caller, name, index, shift = index_shift
             # print("%s -> %s" %(caller.name, self.name))
             # print("%s, %s, %s" % (name, index, shift))
 
             # Find the start index of the changed caller
-            start = 0
-            for parent in self.parents:
-                if parent is caller:
-                    break
-                start += parent.datapoints
+            start = self._parent_start(caller)
 
             # Adjust index according to start index of parent/caller
             index = start + index
@@ -477,9 +602,18 @@ class MultiRegion(Region):
             self.set_changed(level=1, index_shift=index_shift,
                              includeself=False)
 
+        # Shift the cached data according to the index_shift, instead of
+        # recalculating it. The index_shift of self is caused by adding or
+        # removing a parent.
+        if (index_shift is not None and (ancestor or calledfromself)
+                and not (calledfromself and leave_cache)):
+            leave_cache = self._shift_cache(
+                self._shift_segments(*index_shift[1:]))
+
         # Set or unset cached data and update update status
         super().member_changed(ancestor=ancestor,
-                               calledfromself=calledfromself, **kwargs)
+                               calledfromself=calledfromself,
+                               leave_cache=leave_cache, **kwargs)
 
     @property
     def group(self):
@@ -502,10 +636,41 @@ class MultiRegion(Region):
     @property
     def stop(self):
         # the sum of all parent.datapoints
-        datapoints = 0
-        for parent in self.parents:
-            datapoints += parent.datapoints
-        return datapoints
+        return int(self._offsets()[1][-1])
+
+    def _offsets(self):
+        """
+        Return the parents and the indices of the first samples of the
+        parents. The indices are cached until the parents or the number of
+        datapoints of a parent change (see `member_changed()`).
+
+        Returns
+        -------
+        tuple of (list of Region, 1D numpy.ndarray of int)
+            The parents and the cumulative sum of the datapoints of the
+            parents, starting with 0. The last element is the number of
+            datapoints of all parents.
+        """
+        offsets = self._v_offsets
+        if offsets is None:
+            parents = list(self.parents)
+            datapoints = [parent.datapoints for parent in parents]
+            starts = np.zeros(len(parents) + 1, dtype=np.int64)
+            np.cumsum(datapoints, out=starts[1:])
+            offsets = (parents, starts)
+            self._v_offsets = offsets  # ZODB volatile
+        return offsets
+
+    def _parent_start(self, region):
+        """
+        Return the index of the first sample of the parent `region`, or the
+        number of datapoints of all parents, if `region` is no parent.
+        """
+        parents, starts = self._offsets()
+        for parent, start in zip(parents, starts):
+            if parent is region:
+                return int(start)
+        return int(starts[-1])
 
     @property
     def records(self):
@@ -557,6 +722,14 @@ class MultiRegion(Region):
             return []
         return self.record.traces
 
+    @property
+    def dtype(self):
+        # Concatenated data of all parents needs a common type
+        dtypes = [parent.dtype for parent in self.parents]
+        if len(dtypes) == 0:
+            return np.dtype(float)
+        return np.result_type(*dtypes)
+
     @property
     def samplingrate(self):
         if self.record is None:
@@ -622,16 +795,13 @@ class MultiRegion(Region):
         if not super().add_parent(region, index=index, after=after,
                                   before=before, set_changed=False):
             return False
+        self._v_offsets = None  # ZODB volatile
 
         index_shift = None
         if update_indices:
             # Determine index, where insertion took place.
-            index = 0
-            for parent in self.parents:
-                if parent is region:
-                    break
-                index += parent.datapoints
-    
+            index = self._parent_start(region)
+
             # Create index_shift: (caller, name, index, shift)
             # Virtually, adding a region, is as if one would shift the stop of the
             # preceding region by region.datapoints.
@@ -653,11 +823,7 @@ class MultiRegion(Region):
         # self.member_changed().
 
         # Determine index, where removal will take place.
-        index = 0
-        for parent in self.parents:
-            if parent is region:
-                break
-            index += parent.datapoints
+        index = self._parent_start(region)
 
         # Remove parent
         # super().remove_parent() would call set_changed() itself, without any
@@ -668,6 +834,7 @@ class MultiRegion(Region):
         # specific one with the index_shift information.
         if not super().remove_parent(region, set_changed=False):
             return False
+        self._v_offsets = None  # ZODB volatile
 
         index_shift = None
         if update_indices:
@@ -684,7 +851,12 @@ class MultiRegion(Region):
     def _get_data_uncached(self, samples, traces_idx, copy=True):
         """
         Return concatenated data from all parents.
+
+        The parents serving the requested samples are looked up in the
+        cumulative start indices of the parents (see `_offsets()`) and their
+        data is written into one preallocated array.
         """
+        parents, starts = self._offsets()
 
         # determine num_traces
         if isinstance(traces_idx, slice):
@@ -697,74 +869,73 @@ class MultiRegion(Region):
             # traces is an np.array
             num_traces = len(traces_idx)
 
-        # determine the global boundaries of requested samples and datapoints
-        if isinstance(samples, slice):
-            s_start = samples.start
-            s_stop = samples.stop
-            s_step = samples.step
-            datapoints = int(np.ceil((s_stop - s_start) / s_step))
-        else:
+        if isinstance(samples, slice) and samples.step < 0:
+            # Serve samples in descending order as an index array
+            samples = np.arange(starts[-1])[samples]
+
+        if not isinstance(samples, slice):
             # samples is an np.array
-            s_start = samples.min()
-            s_stop = samples.max() + 1
-            # datapoints = len(samples)
-            # datapoints from every single parent need to be appended on the
-            # fly (np.vstack)
-            datapoints = 0
-
-        # Go through all parents and get data from all parents, whose
-        # datapoints fall within the requested samples region.
-        # Initialize running indices start and stop, which keep track of
-        # samples served by every single parent.
-        start = 0
-        stop = 0
+            data = np.empty((len(samples), num_traces), dtype=self.dtype)
+            # Index of the parent serving each sample
+            parent_idx = np.searchsorted(starts, samples, side='right') - 1
+            for i in np.unique(parent_idx):
+                requested = parent_idx == i
+                sub_samples = samples[requested] - starts[i]
+                data[requested] = parents[i]._get_data(sub_samples,
+                                                       traces_idx, copy=False)
+            return data
+
+        # determine the global boundaries of requested samples and datapoints
+        s_start = samples.start
+        s_stop = samples.stop
+        s_step = samples.step
+        datapoints = len(range(s_start, s_stop, s_step))
+
         # initialize array, which will hold all data from parents
-        data = np.empty((datapoints, num_traces))
-        for parent in self.parents:
-            # set lower bound of index of data served by current parent
-            # -> start of current parent is stop of previous parent
-            start = stop
-            # set upper bound of index of data served by current parent
-            # -> stop of current parent is:
-            stop = start + parent.datapoints
-            # Check, whether data of current parent is requested by samples
-            if start < s_stop and stop > s_start:
-                # create sub fraction of samples for current parent
-                if isinstance(samples, slice):
-                    # treat steps/decimate
-                    if start <= s_start:
-                        # requested data served by the first parent -> s_start
-                        # is index of first datapoint -> no shift, correct
-                        # sub_start by start
-                        req_start = 0
-                        sub_start = s_start - start
-                    else:
-                        # requested data served by a subsequent parent -> start
-                        # is index of first datapoint -> shift start of data
-                        # according to steps left over by num_samples % s_step
-                        #  either some steps left over -> shift is ->
-                        #   shift = s_step - steps_left_over
-                        #  or if no stpes left over -> no shift ->
-                        #   shift = s_step - s_step
-                        shift = s_step - ((start - s_start) % s_step or s_step)
-                        req_start = (start - s_start + shift) / s_step
-                        sub_start = shift
-                    req_stop = np.ceil((min(stop, s_stop) - s_start) / s_step)
-                    sub_stop = min(stop, s_stop) - start
-                    requested = slice(int(req_start), int(req_stop))
-                    sub_samples = slice(sub_start, sub_stop, s_step)
-                    # get data from parent
-                    data[requested] = parent._get_data(sub_samples, traces_idx,
-                                                       copy)
-                else:
-                    # samples is an np.array:
-                    #   minimum index can be equal to start (0) or greater
-                    #   maximum index has to be lesser than stop (datapoints)
-                    requested = np.logical_and(samples >= start,
-                                               samples < stop)
-                    sub_samples = samples[requested] - start
-                    # get data from parent and append to data
-                    p_data = parent._get_data(sub_samples, traces_idx, copy)
-                    data = np.vstack((data, p_data))
+        data = np.empty((datapoints, num_traces), dtype=self.dtype)
+        if datapoints == 0:
+            return data
+
+        # Go through all parents, whose datapoints fall within the requested
+        # samples region.
+        first = np.searchsorted(starts, s_start, side='right') - 1
+        last = np.searchsorted(starts, s_stop, side='left')
+        for i in range(first, last):
+            # start and stop index of data served by current parent
+            start = int(starts[i])
+            stop = int(starts[i + 1])
+            if stop <= start:
+                # Parent without any datapoints
+                continue
+            # create sub fraction of samples for current parent
+            # treat steps/decimate
+            if start <= s_start:
+                # requested data served by the first parent -> s_start
+                # is index of first datapoint -> no shift, correct
+                # sub_start by start
+                req_start = 0
+                sub_start = s_start - start
+            else:
+                # requested data served by a subsequent parent -> start
+                # is index of first datapoint -> shift start of data
+                # according to steps left over by num_samples % s_step
+                #  either some steps left over -> shift is ->
+                #   shift = s_step - steps_left_over
+                #  or if no stpes left over -> no shift ->
+                #   shift = s_step - s_step
+                shift = s_step - ((start - s_start) % s_step or s_step)
+                req_start = (start - s_start + shift) // s_step
+                sub_start = shift
+            req_stop = -(-(min(stop, s_stop) - s_start) // s_step)
+            sub_stop = min(stop, s_stop) - start
+            requested = slice(req_start, req_stop)
+            sub_samples = slice(sub_start, sub_stop, s_step)
+            if start <= s_start and s_stop <= stop:
+                # All requested data is served by the current parent,
+                # pass the data of the parent through
+                return parents[i]._get_data(sub_samples, traces_idx, copy)
+            # get data from parent, it is copied into data anyway
+            data[requested] = parents[i]._get_data(sub_samples, traces_idx,
+                                                   copy=False)
 
         return data
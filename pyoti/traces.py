@@ -12,6 +12,9 @@ from . import helpers as hp
 
 
 class Traces(object):
+    # Increased on every reload, to let memoized trace selections (see
+    # `Region.traces_to_idx()`) know about possibly changed aliases
+    version = 0
 
     def __init__(self, cfgfile, **kwargs):
         self._cfgfile = cfgfile
@@ -27,6 +30,7 @@ class Traces(object):
         cfgfile = cfgfile or self.cfgfile
         cfg = cf.read_cfg_file(cfgfile)
         self._cfgfile = cfgfile
+        self.version += 1
 
         self._TRACE_ALIASES = {a: [t.strip() for t in traces.split(',')]
                                for a, traces
@@ -87,7 +87,9 @@ if not abort:
                                   './plugins/calibsources/cellnano.py',
                                   './plugins/calibsources/pyotic.py',
                                   './plugins/datasources/cellnano.py',
+                                  './plugins/datasources/chunked.py',
                                   './plugins/datasources/generic.py',
                                   './evaluate/fast.pyx',
+                                  './evaluate/median.pyx',
                                   ]},
           )